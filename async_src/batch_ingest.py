@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+from async_src.features import FEATURES
+from async_src.manifest import ProcessedManifest
+from async_src.processing import FileProcessor, PARSE_ENGINES, INGEST_MODES, OUTPUT_FORMATS, MIN_STORAGES, BACKENDS
+
+
+def find_sensor_dirs(root):
+    """
+    Поиск папок с CSV-файлами в дереве
+    :param root: общая директория
+    :return: пути к папкам датчиков
+    """
+    for path, _, files in os.walk(root):
+        if any(filename.lower().endswith('.csv') for filename in files):
+            yield path
+
+
+class BatchIngest:
+    """
+    Класс для пакетной обработки архива CSV-файлов без интерфейса
+    Использует тот же FileProcessor, что и мониторинг, и тот же манифест,
+    поэтому прерванную обработку можно продолжить повторным запуском
+    """
+
+    def __init__(self, root, concurrency=4, progress_interval=2, checkpoint_every=100, **options):
+        self.root = root
+        self.processor = FileProcessor(root, [], **options)
+        self.concurrency = concurrency  # Сколько папок датчиков обрабатывается одновременно
+        self.progress_interval = progress_interval  # Интервал вывода прогресса (секунды)
+        self.checkpoint_every = checkpoint_every  # Через сколько файлов сохранять манифест
+
+        self.files_total = 0
+        self.files_done = 0
+        self.files_skipped = 0
+        self.bytes_done = 0
+        self.started = None
+
+    @staticmethod
+    def scan_dir(sensor_dir):
+        """
+        Список CSV-файлов папки в порядке времени изменения
+        :param sensor_dir: путь к папке датчика
+        :return: список (имя файла, os.stat)
+        """
+        files = []
+        with os.scandir(sensor_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith('.csv'):
+                    files.append((entry.name, entry.stat()))
+        return sorted(files, key=lambda item: item[1].st_mtime_ns)
+
+    async def ingest_dir(self, semaphore, sensor_dir, files):
+        """
+        Обработка одной папки датчика
+        Файлы обрабатываются по очереди, чтобы сохранить порядок строк в min_values.txt
+        :param semaphore: ограничение числа одновременно обрабатываемых папок
+        :param sensor_dir: путь к папке датчика
+        :param files: список (имя файла, os.stat)
+        """
+        async with semaphore:
+            manifest = ProcessedManifest(sensor_dir)
+            unsaved = 0
+            try:
+                for filename, stat in files:
+                    if manifest.is_processed(filename, stat):
+                        self.files_skipped += 1
+                        continue
+
+                    # Строка минимума получает время изменения CSV, а не время обработки архива
+                    await self.processor.process_file(sensor_dir, filename, datetime.fromtimestamp(stat.st_mtime))
+                    unsaved += 1
+                    save = unsaved >= self.checkpoint_every
+                    if save:  # Данные попадают в базу раньше, чем файлы отмечаются в манифесте
+                        await self.processor.flush()
+                    await manifest.mark_processed(filename, stat, save=save)
+                    if save:
+                        unsaved = 0
+
+                    self.files_done += 1
+                    self.bytes_done += stat.st_size
+            finally:
+                if unsaved:
+                    await self.processor.flush()
+                    await manifest.save()
+
+    def print_progress(self):
+        """
+        Вывод прогресса обработки
+        """
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        print(f'{self.files_done + self.files_skipped}/{self.files_total} files '
+              f'({self.files_skipped} already processed), '
+              f'{self.files_done / elapsed:.1f} files/s, '
+              f'{self.bytes_done / 1024 / 1024 / elapsed:.2f} MB/s', file=sys.stderr)
+
+    async def report_progress(self):
+        """
+        Периодический вывод прогресса
+        """
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self.print_progress()
+
+    async def run(self):
+        """
+        Обработка всего дерева
+        """
+        sensor_dirs = [(sensor_dir, self.scan_dir(sensor_dir)) for sensor_dir in find_sensor_dirs(self.root)]
+        self.files_total = sum(len(files) for _, files in sensor_dirs)
+        self.started = time.perf_counter()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.processor.start_executor()
+        reporter = asyncio.create_task(self.report_progress())
+        try:
+            await asyncio.gather(*[self.ingest_dir(semaphore, sensor_dir, files) for sensor_dir, files in sensor_dirs])
+        finally:
+            reporter.cancel()
+            self.processor.shutdown_executor()
+            await self.processor.close()
+            self.print_progress()
+
+
+def main(argv=None):
+    """
+    Пакетная обработка: python -m async_src.batch_ingest PATH [опции]
+    """
+    parser = argparse.ArgumentParser(description='Process a tree of sensor CSV files without the GUI')
+    parser.add_argument('path', help='common directory with sensor directories')
+    parser.add_argument('--concurrency', type=int, default=4, help='sensor directories processed at once')
+    parser.add_argument('--engine', choices=PARSE_ENGINES, default='numpy', help='CSV parse engine')
+    parser.add_argument('--ingest-mode', choices=INGEST_MODES, default='async',
+                        help="'process' parses files in a pool of worker processes")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes for --ingest-mode process')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='text', help='spectrum output format')
+    parser.add_argument('--min-storage', choices=MIN_STORAGES, default='text',
+                        help="'segmented' writes minimums into day segments with a time index")
+    parser.add_argument('--backend', choices=BACKENDS, default='files',
+                        help="'sqlite' stores minimums and spectra in one WAL database in PATH")
+    parser.add_argument('--streaming', action='store_true',
+                        help='parse and write spectra in chunks so memory does not grow with file size')
+    parser.add_argument('--features', nargs='+', choices=list(FEATURES), default=(),
+                        help='spectrum features written as extra min_values.txt columns')
+    parser.add_argument('--progress-interval', type=float, default=2, help='seconds between progress lines')
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help='files between manifest saves; after a crash up to this many files are reprocessed')
+    args = parser.parse_args(argv)
+
+    ingest = BatchIngest(args.path, concurrency=args.concurrency, progress_interval=args.progress_interval,
+                         checkpoint_every=args.checkpoint_every, parse_engine=args.engine,
+                         ingest_mode=args.ingest_mode, workers=args.workers, output_format=args.output_format,
+                         min_storage=args.min_storage, backend=args.backend,
+                         streaming=args.streaming, features=args.features)
+    try:
+        asyncio.run(ingest.run())
+    except KeyboardInterrupt:
+        print('Interrupted, run again to resume', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import numpy as np
+
+DECIMATION_METHODS = ('minmax', 'lttb')  # Минимум/максимум на пиксель или Largest-Triangle-Three-Buckets
+
+
+def minmax_indices(x, y, buckets):
+    """
+    Прореживание по корзинам одинаковой ширины по оси x:
+    в каждой корзине остаются точки с минимальным и максимальным значением
+    :param x: массив координат x
+    :param y: массив значений
+    :param buckets: количество корзин (обычно ширина графика в пикселях)
+    :return: отсортированный массив индексов оставленных точек
+    """
+    order = None
+    if np.any(x[1:] < x[:-1]):
+        order = np.argsort(x, kind='stable')
+        x, y = x[order], y[order]
+
+    span = x[-1] - x[0]
+    if span <= 0:
+        bucket = np.zeros(len(x), dtype=np.int64)
+    else:
+        bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(x)]))
+
+    indices = [[0, len(x) - 1]]
+    for reduce in (np.minimum, np.maximum):
+        # Первая точка в каждой корзине, совпадающая с экстремумом корзины
+        candidates = np.flatnonzero(y == reduce.reduceat(y, starts)[group])
+        _, first = np.unique(group[candidates], return_index=True)
+        indices.append(candidates[first])
+
+    indices = np.unique(np.concatenate(indices))
+    return indices if order is None else np.sort(order[indices])
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Прореживание алгоритмом Largest-Triangle-Three-Buckets
+    :param x: массив координат x (по возрастанию)
+    :param y: массив значений
+    :param threshold: количество точек на выходе
+    :return: массив индексов оставленных точек
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)  # Границы корзин без первой и последней точки
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, length - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else length
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Площадь треугольника (выбранная точка, кандидат, среднее следующей корзины)
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def decimate(x, y, pixels, method='minmax'):
+    """
+    Выбор точек для отображения на графике шириной pixels
+    :param x: массив координат x
+    :param y: массив значений
+    :param pixels: ширина графика в пикселях
+    :param method: 'minmax' или 'lttb'
+    :return: массив индексов оставленных точек
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f'Unknown decimation method: {method}')
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= 2 * pixels:
+        return np.arange(len(x))
+
+    if method == 'lttb':
+        return lttb_indices(x, y, 2 * pixels)
+    return minmax_indices(x, y, pixels)
@@ -0,0 +1,102 @@
+import os
+import sys
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+
+IN_CLOSE_WRITE = 0x00000008  # Файл, открытый на запись, закрыт
+IN_MOVED_TO = 0x00000080  # Файл перемещен в папку
+IN_Q_OVERFLOW = 0x00004000  # Переполнение очереди событий ядра
+IN_NONBLOCK = 0o0004000
+IN_CLOEXEC = 0o2000000
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def load_libc():
+    """
+    Загрузка libc с функциями inotify
+    :return: libc или None, если inotify недоступен
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Класс для отслеживания новых файлов в папках датчиков через inotify
+    Для каждой папки создается очередь, в которую попадают имена записанных файлов.
+    None в очереди означает, что события были потеряны и нужна полная сверка папки
+    """
+
+    def __init__(self):
+        self.libc = load_libc()
+        if self.libc is None:
+            raise OSError('inotify is not supported on this platform')
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self.queues = dict()  # wd -> очередь имен файлов
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.fd, self.read_events)
+
+    @staticmethod
+    def is_supported():
+        """
+        Проверка доступности inotify
+        """
+        return load_libc() is not None
+
+    def add_watch(self, path):
+        """
+        Подписка на события папки
+        :param path: путь к папке датчика
+        :return: очередь с именами файлов, закрытых после записи
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+
+        queue = self.queues.setdefault(wd, asyncio.Queue())
+        return queue
+
+    def read_events(self):
+        """
+        Чтение событий из дескриптора inotify и раскладка по очередям
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                for queue in self.queues.values():
+                    queue.put_nowait(None)
+            elif wd in self.queues and name:
+                self.queues[wd].put_nowait(os.fsdecode(name))
+
+    def close(self):
+        """
+        Отписка от событий и закрытие дескриптора
+        """
+        self.loop.remove_reader(self.fd)
+        os.close(self.fd)
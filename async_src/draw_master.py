@@ -1,29 +1,74 @@
 import os
+import math
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QPushButton, QLabel, QComboBox, QGridLayout, QFileDialog, QMessageBox
+    QLineEdit, QPushButton, QLabel, QComboBox, QGridLayout, QFileDialog, QMessageBox, QScrollArea
 )
+from matplotlib import dates as mdates
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas  # Используем Matplotlib для встраивания графиков
 from matplotlib.figure import Figure
 from PyQt5.QtCore import QTimer  # Модуль для работы с базовыми типами и событиями
 
 from async_src.file_processor import FileProcessorThread
+from async_src.graph_loader import GraphLoaderThread
 from async_src.graph_master import GraphMaster
 from async_src.garbage_collector import GarbageCollectorThread
+from async_src.metrics import metrics
+from async_src.processing import INGEST_MODES, OUTPUT_FORMATS, PARSE_ENGINES, WATCH_MODES
+from async_src.retention import RetentionIndex
+from async_src.spectrum_cache import SpectrumCache
+
+RENDER_MODES = ('reuse', 'redraw')  # Обновление существующих линий или полная перерисовка графиков
+VIEW_MODES = ('grid', 'overview')  # Мониторы с отдельными графиками или обзор минимумов всех датчиков на одной фигуре
+# Окна истории минимумов: подпись и длительность в секундах (None - вся история)
+MIN_WINDOWS = (('Вся история', None), ('6 часов', 6 * 3600), ('24 часа', 24 * 3600),
+               ('7 дней', 7 * 24 * 3600), ('30 дней', 30 * 24 * 3600))
+
+
+class TimedFigureCanvas(FigureCanvas):
+    """
+    Холст matplotlib с замером времени отрисовки
+    """
+    def __init__(self, figure, stage):
+        super().__init__(figure)
+        self.stage = stage
+
+    def draw(self):
+        with metrics.timer(self.stage):
+            super().draw()
 
 
 class SensorMonitor(QMainWindow):
     """
     Класс для визуализации интерфейса и графиков
     """
-    def __init__(self):
+    def __init__(self, render_mode='reuse', background_loading=True, metrics_path=None, metrics_interval=15000,
+                 retention_policy=None, min_storage='text', backend='files', ingest_priority='oldest',
+                 ingest_workers=1, streaming=False, monitors=4, view_mode='grid', overview_columns=4, features=(),
+                 ingest_mode='async', process_workers=None, parse_engine='numpy', watch_mode='auto',
+                 output_format='text'):
         super().__init__()
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f'Unknown render mode: {render_mode}')
+        if view_mode not in VIEW_MODES:
+            raise ValueError(f'Unknown view mode: {view_mode}')
+        # Параметры обработки проверяются сразу, а не при запуске мониторинга из обработчика кнопки
+        if ingest_mode not in INGEST_MODES:
+            raise ValueError(f'Unknown ingest mode: {ingest_mode}')
+        if parse_engine not in PARSE_ENGINES:
+            raise ValueError(f'Unknown parse engine: {parse_engine}')
+        if watch_mode not in WATCH_MODES:
+            raise ValueError(f'Unknown watch mode: {watch_mode}')
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {output_format}')
 
         self.setWindowTitle(f'Mr. Sensor Monitor')  # Устанавливаем название окна
         self.setGeometry(100, 100, 1200, 700)  # Устанавливаем размеры окна
         self.status_label = QLabel(f"Monitoring status: Stopped")
 
-        self.selected_sensors = ['None', 'None', 'None', 'None']
+        self.monitors = monitors  # Количество мониторов в сетке
+        self.selected_sensors = ['None'] * monitors
         self.sensor_dropdowns = []  # Список для хранения всех dropdown меню
 
         self.graphs = []  # Список для хранения графиков минимумов
@@ -33,12 +78,60 @@ class SensorMonitor(QMainWindow):
         self.wave_canvas = []
         self.min_canvas = []
 
+        self.render_mode = render_mode
+        self.min_lines = []  # Линия минимумов для каждого монитора (режим reuse)
+        self.wave_lines = []  # Линии волн для каждого монитора (режим reuse)
+        self.min_signatures = []  # Подписи отображаемых данных, чтобы не перерисовывать без изменений
+        self.wave_signatures = []
+        self.min_windows = []  # Окно истории минимумов для каждого монитора (секунды, None - вся история)
+        self.min_features = []  # Признак спектра на графике истории каждого монитора (None - минимум)
+
+        # Фоновая загрузка данных графиков (только для режима reuse)
+        self.background_loading = background_loading and render_mode == 'reuse'
+        self.graph_loader = None
+        self.graph_requests = []  # Номер последнего запроса для каждого монитора
+
+        self.spectrum_cache = SpectrumCache()  # Кэш спектров сохраняется между перезапусками мониторинга
+        self.retention_policy = retention_policy  # Правила хранения файлов (None - по умолчанию, 4 последних)
+        self.min_storage = min_storage  # Хранение истории минимумов: 'text' или 'segmented'
+        self.backend = backend  # Хранение результатов: 'files' или 'sqlite'
+        self.ingest_priority = ingest_priority  # 'newest' - новые файлы обрабатываются раньше накопившихся
+        self.ingest_workers = ingest_workers  # Обработчиков очереди на каждый датчик
+        self.streaming = streaming  # Потоковый разбор больших файлов блоками
+        self.features = features  # Признаки спектра, которые пишутся в min_values.txt при обработке
+        self.ingest_mode = ingest_mode  # 'process' - разбор и запись спектров в пуле процессов
+        self.process_workers = process_workers  # Процессов в режиме process (None - по числу ядер)
+        self.parse_engine = parse_engine  # Движок разбора CSV: 'numpy' или 'aiocsv'
+        self.watch_mode = watch_mode  # Отслеживание новых файлов: 'auto', 'inotify' или 'poll'
+        self.output_format = output_format  # Формат файлов спектров: 'text' или 'binary'
+
+        # Обзор: графики минимумов всех датчиков на одной общей фигуре
+        self.view_mode = view_mode
+        self.overview_columns = overview_columns
+        self.overview_sensors = []
+        self.overview_axes = []
+        self.overview_lines = []
+        self.overview_signatures = []
+        self.overview_requests = []
+
+        # Обновление мониторов, ставших видимыми после прокрутки или изменения размера окна
+        self.visible_timer = QTimer()
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.timeout.connect(self.refresh_visible_graphs)
+
         self.initUI()  # Инициализация интерфейса
 
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.dynamic_update_graphs)  # Подключаем обновление всех графиков
         self.update_interval = 5000  # Интервал обновления (в миллисекундах)
 
+        # Периодическая выгрузка метрик: .json - JSON, иначе текстовый формат Prometheus
+        self.metrics_path = metrics_path
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.export_metrics)
+        if metrics_path:
+            self.metrics_timer.start(metrics_interval)
+
     def initUI(self):
         """
         Инициализация интерфейса
@@ -62,17 +155,32 @@ class SensorMonitor(QMainWindow):
         main_layout.addLayout(path_layout)
 
         # 2. Секция для датчиков
+        sensors_widget = QWidget()
         sensors_layout = QGridLayout()  # Сетка для размещения датчиков и графиков
 
-        # Создаем 4 блока для датчиков
-        for i in range(4):
+        # Создаем блоки для датчиков
+        for i in range(self.monitors):
             sensor_block = self.create_sensor_block(f"Monitor {i + 1}", )
             sensors_layout.addLayout(sensor_block, i, 0)
 
-        main_layout.addLayout(sensors_layout)
+        sensors_widget.setLayout(sensors_layout)
+        self.grid_area = self.create_scroll_area(sensors_widget)
+        main_layout.addWidget(self.grid_area, stretch=1)
+
+        # 3. Обзор: одна фигура с маленькими графиками минимумов всех датчиков
+        self.overview_figure = Figure(figsize=(8, 3))
+        self.overview_canvas = TimedFigureCanvas(self.overview_figure, 'draw_overview')
+        self.overview_area = self.create_scroll_area(self.overview_canvas)
+        main_layout.addWidget(self.overview_area, stretch=1)
 
         button_layout = QHBoxLayout()
 
+        view_dropdown = QComboBox()
+        view_dropdown.addItems(['Мониторы', 'Обзор'])
+        view_dropdown.setCurrentIndex(VIEW_MODES.index(self.view_mode))
+        view_dropdown.currentIndexChanged.connect(lambda index: self.set_view_mode(VIEW_MODES[index]))
+        button_layout.addWidget(view_dropdown)
+
         # Кнопка старта мониторинга
         run_button = QPushButton("Start Monitoring")
         run_button.clicked.connect(self.start_file_monitoring)
@@ -86,6 +194,60 @@ class SensorMonitor(QMainWindow):
         # Устанавливаем главное окно
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)  # Устанавливаем основное содержимое
+        self.set_view_mode(self.view_mode)
+
+    def create_scroll_area(self, widget):
+        """
+        Область прокрутки; при прокрутке обновляются графики, ставшие видимыми
+        :param widget: содержимое области
+        :return: QScrollArea
+        """
+        area = QScrollArea()
+        area.setWidgetResizable(True)
+        area.setWidget(widget)
+        area.verticalScrollBar().valueChanged.connect(self.schedule_visible_refresh)
+        return area
+
+    def set_view_mode(self, view_mode):
+        """
+        Переключение между сеткой мониторов и обзором
+        Скрытые графики не обновляются
+        """
+        self.view_mode = view_mode
+        self.grid_area.setVisible(view_mode == 'grid')
+        self.overview_area.setVisible(view_mode == 'overview')
+        self.schedule_visible_refresh()
+
+    def schedule_visible_refresh(self, *_):
+        """
+        Отложенное обновление видимых графиков (события прокрутки объединяются)
+        """
+        if self.update_timer_active():
+            self.visible_timer.start(150)
+
+    def update_timer_active(self):
+        """
+        Мониторинг запущен и графики обновляются по таймеру
+        """
+        timer = getattr(self, 'update_timer', None)
+        return timer is not None and timer.isActive()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_visible_refresh()
+
+    @staticmethod
+    def is_on_screen(widget):
+        """
+        Виден ли виджет: окно не свернуто и виджет не скрыт прокруткой
+        """
+        return widget.isVisible() and not widget.window().isMinimized() and not widget.visibleRegion().isEmpty()
+
+    def is_block_visible(self, block_index):
+        """
+        Виден ли хотя бы один график монитора
+        """
+        return self.is_on_screen(self.min_canvas[block_index]) or self.is_on_screen(self.wave_canvas[block_index])
 
     def get_sensor_directories(self, directory):
         """
@@ -116,6 +278,7 @@ class SensorMonitor(QMainWindow):
             self.sensor_directories = self.get_sensor_directories(directory)
             # Сохраняем путь в переменную (можно использовать его для дальнейшей работы)
             self.update_sensor_blocks()
+            self.layout_overview()
             return directory, self.sensor_directories
 
     def create_sensor_block(self, sensor_name):
@@ -153,7 +316,25 @@ class SensorMonitor(QMainWindow):
         # 3. График минимумов
         min_graph_label = QLabel(f"Минимумы для {sensor_name}")
         min_graph = self.create_graph_widget()  # Создаем график
-        graph_slider_layout.addWidget(min_graph_label)
+
+        # Выбор окна истории минимумов
+        block_index = len(self.min_windows)
+        window_dropdown = QComboBox()
+        window_dropdown.addItems([label for label, _ in MIN_WINDOWS])
+        window_dropdown.currentIndexChanged.connect(
+            lambda index, block=block_index: self.on_window_changed(block, index))
+
+        # Выбор признака спектра для графика истории
+        feature_dropdown = QComboBox()
+        feature_dropdown.addItems(GraphMaster.get_features())
+        feature_dropdown.currentIndexChanged.connect(
+            lambda index, block=block_index: self.on_feature_changed(block, feature_dropdown.itemText(index)))
+
+        min_header_layout = QHBoxLayout()
+        min_header_layout.addWidget(min_graph_label)
+        min_header_layout.addWidget(feature_dropdown)
+        min_header_layout.addWidget(window_dropdown)
+        graph_slider_layout.addLayout(min_header_layout)
         graph_slider_layout.addWidget(min_graph, stretch=3)
 
         # Добавляем вертикальный лэйаут (график + ползунок) в горизонтальный основной лэйаут
@@ -162,6 +343,13 @@ class SensorMonitor(QMainWindow):
 
         # Добавляем график и ползунок в соответствующие списки для последующего обновления
         self.graphs.append(min_graph)
+        self.min_lines.append(None)
+        self.wave_lines.append([])
+        self.min_signatures.append(None)
+        self.wave_signatures.append(None)
+        self.min_windows.append(None)
+        self.min_features.append(None)
+        self.graph_requests.append(None)
 
         return layout
 
@@ -172,24 +360,71 @@ class SensorMonitor(QMainWindow):
         path_to_dirs = self.path_input.text()
 
         if path_to_dirs:
+            self.stop_threads()  # Предыдущий запуск должен записать свои данные до старта нового
             self.status_label.setText("Monitoring status: Running")
-            self.file_processor_thread = FileProcessorThread(path_to_dirs, self.sensor_directories)
-            self.garbage_collector_thread = GarbageCollectorThread(path_to_dirs, self.sensor_directories)
-            self.graph_master = GraphMaster(path_to_dirs, self.sensor_directories)
+            retention_index = RetentionIndex()
+            self.file_processor_thread = FileProcessorThread(path_to_dirs, self.sensor_directories,
+                                                             retention_index=retention_index,
+                                                             min_storage=self.min_storage, backend=self.backend,
+                                                             priority=self.ingest_priority,
+                                                             workers_per_sensor=self.ingest_workers,
+                                                             streaming=self.streaming, features=self.features,
+                                                             ingest_mode=self.ingest_mode,
+                                                             workers=self.process_workers,
+                                                             parse_engine=self.parse_engine,
+                                                             watch_mode=self.watch_mode,
+                                                             output_format=self.output_format)
+            self.garbage_collector_thread = GarbageCollectorThread(path_to_dirs, self.sensor_directories,
+                                                                   retention_index, self.retention_policy)
+            self.graph_master = GraphMaster(path_to_dirs, self.sensor_directories, spectrum_cache=self.spectrum_cache,
+                                            backend=self.backend)
+            if self.background_loading:
+                self.start_graph_loader()
+            self.layout_overview()
             self.file_processor_thread.start()
             self.garbage_collector_thread.start()
             self.update_timer.start(self.update_interval)  # Запускаем таймер
 
+    def start_graph_loader(self):
+        """
+        Запуск фонового загрузчика данных графиков для текущего GraphMaster
+        """
+        if self.graph_loader is not None:
+            self.graph_loader.stop()
+            self.graph_loader.wait()
+
+        self.graph_loader = GraphLoaderThread(self.graph_master)
+        self.graph_loader.data_ready.connect(self.on_graph_data)
+        self.graph_loader.start()
+
     def stop_file_monitoring(self):
         """
         Остановка приложения
         """
-        try:
-            self.status_label.setText("Monitoring status: Stopped")
-            self.file_processor_thread.stop()
-            self.garbage_collector_thread.stop()
-        except AttributeError:
+        if getattr(self, 'file_processor_thread', None) is None:
             self.show_error_message('File processor thread is not running')
+            return
+        self.status_label.setText("Monitoring status: Stopped")
+        self.stop_threads()
+
+    def stop_threads(self):
+        """
+        Остановка таймера обновления и потоков с ожиданием записи накопленных данных
+        """
+        self.update_timer.stop()
+        for name in ('file_processor_thread', 'garbage_collector_thread', 'graph_loader'):
+            thread = getattr(self, name, None)
+            if thread is not None:
+                thread.stop()
+                thread.wait()
+                setattr(self, name, None)
+
+    def closeEvent(self, event):
+        """
+        Закрытие окна: останавливаем потоки и ждем записи накопленных данных
+        """
+        self.stop_threads()
+        super().closeEvent(event)
 
     def create_graph_widget(self):
         """
@@ -198,7 +433,8 @@ class SensorMonitor(QMainWindow):
         """
         # Используем Matplotlib для создания графиков минимумов
         figure = Figure(figsize=(8, 3))  # Задаем размер графика
-        min_canvas = FigureCanvas(figure)  # Контейнер для графика
+        min_canvas = TimedFigureCanvas(figure, 'draw_min')  # Контейнер для графика
+        min_canvas.setMinimumHeight(200)  # Не сжимаем графики в области прокрутки
         ax = figure.add_subplot(111)  # Добавляем ось для построения графика
         figure.subplots_adjust(bottom=0.2)
 
@@ -214,7 +450,8 @@ class SensorMonitor(QMainWindow):
         """
         # Используем Matplotlib для создания волновых графиков
         figure = Figure(figsize=(8, 3))  # Размер волнового графика
-        wave_canvas = FigureCanvas(figure)  # Контейнер для графика
+        wave_canvas = TimedFigureCanvas(figure, 'draw_waves')  # Контейнер для графика
+        wave_canvas.setMinimumHeight(200)
         ax = figure.add_subplot(111)
         figure.subplots_adjust(bottom=0.2)
 
@@ -225,10 +462,114 @@ class SensorMonitor(QMainWindow):
 
     def update_graphs(self, sensor, block_index):
         """
-        Обновление графиков
+        Обновление графиков в соответствии с render_mode
+        При фоновой загрузке данные запрашиваются у загрузчика и отрисовываются по сигналу
+        """
+        if self.graph_loader is not None:
+            self.request_graphs(sensor, block_index)
+        elif self.render_mode == 'reuse':
+            self.render_graphs(sensor, block_index)
+        else:
+            self.redraw_graphs(sensor, block_index)
+
+    def render_graphs(self, sensor, block_index):
+        """
+        Синхронная загрузка данных и обновление графиков без пересоздания линий
+        """
+        try:
+            data = self.graph_master.get_graph_data(sensor, self.wave_signatures[block_index],
+                                                    self.min_canvas[block_index].width(),
+                                                    self.min_windows[block_index],
+                                                    feature=self.min_features[block_index])
+        except AttributeError:
+            print('Error: no file processor thread. Launch monitoring first')
+            return
+        except Exception as e:
+            print(e)
+            return
+
+        self.apply_graph_data(block_index, data)
+
+    def request_graphs(self, sensor, block_index):
+        """
+        Запрос данных графиков у фонового загрузчика
+        """
+        request_id = self.graph_loader.request(block_index, sensor, self.wave_signatures[block_index],
+                                               self.min_canvas[block_index].width(), self.min_windows[block_index],
+                                               feature=self.min_features[block_index])
+        if request_id is not None:
+            self.graph_requests[block_index] = request_id
+
+    def on_graph_data(self, block_index, request_id, data):
+        """
+        Получение данных от фонового загрузчика
+        Ответы на устаревшие запросы отбрасываются
+        """
+        if block_index >= self.monitors:  # Номера после мониторов - графики обзора
+            index = block_index - self.monitors
+            if index < len(self.overview_requests) and request_id == self.overview_requests[index]:
+                self.apply_overview_data(index, data)
+            return
+        if request_id != self.graph_requests[block_index]:
+            return
+        self.apply_graph_data(block_index, data)
+
+    def apply_graph_data(self, block_index, data):
+        """
+        Обновление графиков без пересоздания линий
+        Данные линий заменяются через set_data, холст перерисовывается не более одного раза
+        на график и только если данные изменились
+        :param block_index: номер монитора
+        :param data: данные из GraphMaster.get_graph_data
+        """
+        dates, min_vals = data['dates'], data['min_vals']
+        min_signature = (data['sensor'], data['window'], data['feature'], data['min_count'], len(dates), dates[-1] if dates else None)
+        if min_signature != self.min_signatures[block_index]:
+            with metrics.timer('render_min', data['sensor']):
+                min_ax = self.min_axes[block_index]
+                min_line = self.min_lines[block_index]
+                if min_line is None:
+                    if dates:
+                        self.min_lines[block_index], = min_ax.plot(dates, min_vals, color='b', marker='o',
+                                                                    linestyle='None', markersize=1)
+                else:
+                    min_line.set_data(dates, min_vals)
+                min_ax.relim()
+                min_ax.autoscale_view()
+                self.min_canvas[block_index].draw_idle()
+                self.min_signatures[block_index] = min_signature
+            metrics.record_plotted(data['sensor'])
+
+        if data['waves'] is None or data['wave_signature'] == self.wave_signatures[block_index]:
+            return
+
+        with metrics.timer('render_waves', data['sensor']):
+            wave_ax = self.wave_axes[block_index]
+            wave_lines = self.wave_lines[block_index]
+            for index, (waves, values) in enumerate(data['waves']):
+                if index < len(wave_lines):
+                    wave_lines[index].set_data(waves, values)
+                else:
+                    wave_lines.append(wave_ax.plot(waves, values, color='b', linewidth=0.5)[0])
+
+            for line in wave_lines[len(data['waves']):]:
+                line.remove()
+            del wave_lines[len(data['waves']):]
+
+            wave_ax.relim()
+            wave_ax.autoscale_view()
+            self.wave_canvas[block_index].draw_idle()
+            self.wave_signatures[block_index] = data['wave_signature']
+
+    def redraw_graphs(self, sensor, block_index):
+        """
+        Обновление графиков с полной перерисовкой
         """
+        window = self.min_windows[block_index]
         try:
-            dates, min_vals = self.graph_master.get_min_data(sensor)
+            dates, min_vals = self.graph_master.get_min_data(
+                sensor, datetime.now() - timedelta(seconds=window) if window else None,
+                feature=self.min_features[block_index])
         except AttributeError:
             print('Error: no file processor thread. Launch monitoring first')
             return
@@ -237,6 +578,7 @@ class SensorMonitor(QMainWindow):
         min_ax.clear()
         min_ax.plot(dates, min_vals, color='b', marker='o', linestyle='None', markersize=1)
         self.min_canvas[block_index].draw()
+        metrics.record_plotted(sensor)
 
         try:
             wave_ax = self.wave_axes[block_index]
@@ -261,6 +603,22 @@ class SensorMonitor(QMainWindow):
                 print(e)
         self.selected_sensors = selected_sensors
 
+    def on_window_changed(self, block_index, index):
+        """
+        Метод вызывается при выборе окна истории минимумов монитора
+        """
+        self.min_windows[block_index] = MIN_WINDOWS[index][1]
+        if hasattr(self, 'graph_master') and block_index < len(self.selected_sensors):
+            self.update_graphs(self.selected_sensors[block_index], block_index)
+
+    def on_feature_changed(self, block_index, feature):
+        """
+        Метод вызывается при выборе признака спектра для графика истории монитора
+        """
+        self.min_features[block_index] = feature
+        if hasattr(self, 'graph_master') and block_index < len(self.selected_sensors):
+            self.update_graphs(self.selected_sensors[block_index], block_index)
+
     def get_selected_sensors(self):
         """
         Возвращает список выбранных датчиков из всех выпадающих списков.
@@ -276,12 +634,111 @@ class SensorMonitor(QMainWindow):
         """
         Метод динамического обновления графиков
         """
+        self.refresh_visible_graphs()
+        self.statusBar().showMessage(metrics.summary())
+
+    def refresh_visible_graphs(self):
+        """
+        Обновление графиков, которые сейчас на экране
+        Мониторы, скрытые прокруткой или другим режимом просмотра, не обновляются до появления на экране
+        """
+        if self.view_mode == 'overview':
+            if self.is_on_screen(self.overview_canvas):
+                self.update_overview()
+            return
+
         for sensor in range(len(self.selected_sensors)):
+            if not self.is_block_visible(sensor):
+                continue
             try:
                 self.update_graphs(self.selected_sensors[sensor], sensor)
             except IndexError as e:
                 print(e)
 
+    def layout_overview(self):
+        """
+        Разметка обзора: по маленькому графику минимумов на каждый датчик на одной фигуре
+        """
+        self.overview_sensors = list(getattr(self, 'sensor_directories', []))
+        count = len(self.overview_sensors)
+        columns = max(1, min(self.overview_columns, count))
+        rows = max(1, math.ceil(count / columns))
+
+        self.overview_figure.clear()
+        self.overview_axes = []
+        for index, sensor in enumerate(self.overview_sensors):
+            ax = self.overview_figure.add_subplot(rows, columns, index + 1)
+            ax.set_title(sensor, fontsize=8)
+            ax.tick_params(labelsize=6)
+            locator = mdates.AutoDateLocator(maxticks=3)
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            self.overview_axes.append(ax)
+        self.overview_figure.subplots_adjust(left=0.05, right=0.98, top=0.95, bottom=0.05, hspace=0.6, wspace=0.25)
+
+        self.overview_lines = [None] * count
+        self.overview_signatures = [None] * count
+        self.overview_requests = [None] * count
+        self.overview_canvas.setMinimumHeight(rows * 150)
+        self.overview_canvas.draw_idle()
+
+    def update_overview(self):
+        """
+        Обновление обзора: загружаются только минимумы, прореженные до ширины маленького графика
+        """
+        if not self.overview_sensors:
+            return
+        pixels = max(self.overview_canvas.width() // min(self.overview_columns, len(self.overview_sensors)), 1)
+        for index, sensor in enumerate(self.overview_sensors):
+            if self.graph_loader is not None:
+                request_id = self.graph_loader.request(self.monitors + index, sensor, pixels=pixels, load_waves=False)
+                if request_id is not None:
+                    self.overview_requests[index] = request_id
+                continue
+            try:
+                data = self.graph_master.get_graph_data(sensor, pixels=pixels, load_waves=False)
+            except AttributeError:
+                print('Error: no file processor thread. Launch monitoring first')
+                return
+            except Exception as e:
+                print(e)
+                continue
+            self.apply_overview_data(index, data)
+
+    def apply_overview_data(self, index, data):
+        """
+        Обновление одного графика обзора через set_data
+        Общая фигура перерисовывается один раз для всех изменившихся графиков (draw_idle)
+        """
+        dates, min_vals = data['dates'], data['min_vals']
+        signature = (data['sensor'], data['min_count'], len(dates), dates[-1] if dates else None)
+        if signature == self.overview_signatures[index]:
+            return
+
+        with metrics.timer('render_overview', data['sensor']):
+            ax = self.overview_axes[index]
+            line = self.overview_lines[index]
+            if line is None:
+                if dates:
+                    self.overview_lines[index], = ax.plot(dates, min_vals, color='b', marker='o',
+                                                          linestyle='None', markersize=1)
+            else:
+                line.set_data(dates, min_vals)
+            ax.relim()
+            ax.autoscale_view()
+            self.overview_canvas.draw_idle()
+            self.overview_signatures[index] = signature
+        metrics.record_plotted(data['sensor'])
+
+    def export_metrics(self):
+        """
+        Выгрузка метрик в файл metrics_path
+        """
+        try:
+            metrics.export(self.metrics_path)
+        except OSError as e:
+            print(f'Error: failed to export metrics ({e})')
+
     @staticmethod
     def show_error_message(error_message):
         """
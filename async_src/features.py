@@ -0,0 +1,112 @@
+import numpy as np
+
+FEATURES = dict()  # Имя признака -> функция (wave, values, context) -> float
+MIN_FEATURE = 'min_wave'  # Основной столбец min_values.txt: длина волны минимума по отсчетам
+
+
+def feature(name):
+    """
+    Регистрация функции признака спектра
+    Функция получает массивы длин волн и значений и общий словарь context,
+    в котором хранятся промежуточные результаты (индекс минимума, базовая линия),
+    поэтому несколько признаков считаются за один проход без повторных вычислений
+    :param name: имя признака (имя столбца)
+    """
+    def register(func):
+        FEATURES[name] = func
+        return func
+    return register
+
+
+def min_index(values, context):
+    """
+    Индекс минимума спектра (считается один раз на спектр)
+    """
+    if 'index' not in context:
+        context['index'] = int(np.argmin(values))
+    return context['index']
+
+
+def baseline(values, context):
+    """
+    Базовая линия спектра - медиана значений (считается один раз на спектр)
+    """
+    if 'baseline' not in context:
+        context['baseline'] = float(np.median(values))
+    return context['baseline']
+
+
+@feature('min_wave_fit')
+def min_wave_fit(wave, values, context):
+    """
+    Положение минимума, уточненное параболой по трем точкам вокруг минимального отсчета
+    """
+    index = min_index(values, context)
+    if index == 0 or index == len(values) - 1:
+        return float(wave[index])
+
+    left, center, right = values[index - 1:index + 2]
+    denominator = left - 2 * center + right
+    if denominator == 0:
+        return float(wave[index])
+    offset = 0.5 * (left - right) / denominator
+    return float(wave[index] + offset * (wave[index + 1] - wave[index - 1]) / 2)
+
+
+@feature('depth')
+def depth(wave, values, context):
+    """
+    Глубина провала: базовая линия минус минимальное значение
+    """
+    return baseline(values, context) - float(values[min_index(values, context)])
+
+
+@feature('fwhm')
+def fwhm(wave, values, context):
+    """
+    Ширина провала на половине глубины (с линейной интерполяцией пересечений)
+    Если провал не поднимается до половины глубины с одной из сторон - NaN
+    """
+    index = min_index(values, context)
+    half = float(values[index]) + depth(wave, values, context) / 2
+
+    above_left = np.flatnonzero(values[:index] > half)
+    above_right = np.flatnonzero(values[index + 1:] > half)
+    if not above_left.size or not above_right.size:
+        return float('nan')
+
+    left = above_left[-1]  # Последний отсчет выше половины слева, следующий уже ниже
+    right = index + 1 + above_right[0]  # Первый отсчет выше половины справа, предыдущий еще ниже
+    left_x = np.interp(half, [values[left + 1], values[left]], [wave[left + 1], wave[left]])
+    right_x = np.interp(half, [values[right - 1], values[right]], [wave[right - 1], wave[right]])
+    return float(right_x - left_x)
+
+
+@feature('mean')
+def mean(wave, values, context):
+    """
+    Среднее значение спектра
+    """
+    return float(np.mean(values))
+
+
+def validate_features(names):
+    """
+    Проверка списка признаков
+    :param names: имена признаков
+    """
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f'Unknown features: {", ".join(unknown)}')
+
+
+def extract_features(wave, values, names):
+    """
+    Вычисление признаков спектра за один проход
+    :param wave: массив длин волн
+    :param values: массив значений
+    :param names: имена признаков
+    :return: список значений признаков в порядке names
+    """
+    context = dict()
+    return [FEATURES[name](wave, values, context) for name in names]
@@ -1,20 +1,28 @@
 import asyncio
 import os
-import re
-from aiofiles import os as aos
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from async_src.metrics import metrics
+from async_src.retention import RetentionPolicy, delete_files
+from async_src.sqlite_store import DB_FILE, delete_spectra
+
 
 class GarbageCollectorThread(QThread):
     """
     Класс для удаления ненужных файлов
+    Файлы выбираются по индексу RetentionIndex, который заполняет обработчик файлов
     """
     finished = pyqtSignal()
 
-    def __init__(self, path_to_dirs, sensor_dirs):
+    def __init__(self, path_to_dirs, sensor_dirs, retention_index, policy=None):
         super().__init__()
         self.path_to_dirs = path_to_dirs
         self.sensor_dirs = sensor_dirs
+        self.retention_index = retention_index
+        self.policy = policy or RetentionPolicy()
+        self.loop = None
+        self.task = None
+        self.stopping = False
 
     async def collect_old_files(self, path):
         """
@@ -22,25 +30,27 @@ class GarbageCollectorThread(QThread):
         :param path: Путь к папке датчика
         """
 
-        files = await aos.listdir(path)
-        files = sorted(
-            (filter(lambda x: not re.search(r'(_output.txt$)|(^min_values.txt$)', x), files)),
-            key=lambda x: os.path.getmtime(os.path.join(path, x))
-        )
-        if len(files) > 4:
-            await self.delete_old_files(path, files[4::])
+        sensor = os.path.basename(path)
+        with metrics.timer('gc_sweep', sensor):
+            files = self.retention_index.collect(path, self.policy)
+            if files:
+                deleted = await self.delete_old_files(path, files)
+                metrics.increment('files_deleted', deleted, sensor)
 
     @staticmethod
     async def delete_old_files(path, files):
         """
-        Удаление старых файлов
+        Удаление старых файлов одним пакетом в пуле потоков
+        Спектры этих файлов удаляются и из базы SQLite, если она есть
         :param path: Путь к папке датчика
         :param files: Файлы для удаления
+        :return: количество удаленных файлов
         """
 
-        for file in files:
-            await aos.remove(os.path.join(path, file))
-            await aos.remove(os.path.join(path, file + '_output.txt'))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, delete_spectra, os.path.join(os.path.dirname(path), DB_FILE),
+                                   os.path.basename(path), files)
+        return await loop.run_in_executor(None, delete_files, path, files)
 
     async def garbage_process(self):
         """
@@ -60,8 +70,17 @@ class GarbageCollectorThread(QThread):
 
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.garbage_process())
-        loop.close()
+        self.task = loop.create_task(self.garbage_process())
+        self.loop = loop
+        if self.stopping:  # stop() вызван до запуска цикла
+            self.task.cancel()
+        try:
+            loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop = None
+            loop.close()
 
     def stop(self):
         """
@@ -69,4 +88,11 @@ class GarbageCollectorThread(QThread):
         :return:
         """
 
+        self.stopping = True
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self.task.cancel)
+            except RuntimeError:  # Цикл уже закрыт
+                pass
         self.finished.emit()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class GraphLoaderThread(QThread):
+    """
+    Класс для фоновой загрузки данных графиков
+    Запросы хранятся по номеру монитора: новый запрос заменяет еще не выполненный,
+    повторный запрос того же датчика, пока предыдущий выполняется, отбрасывается.
+    Каждый монитор загружается независимо: медленная загрузка одного монитора не задерживает остальные,
+    а новый запрос монитора ждет только завершения его собственной загрузки
+    """
+    data_ready = pyqtSignal(int, int, object)  # Номер монитора, номер запроса, данные графиков
+
+    def __init__(self, graph_master):
+        super().__init__()
+        self.graph_master = graph_master
+        self.lock = threading.Lock()
+        self.pending = dict()  # Номер монитора -> (номер запроса, датчик, подпись волн, ширина графика, окно истории,
+        # загружать волны, признак)
+        # Номер монитора -> (номер запроса, (датчик, окно истории, признак)), данные которого сейчас загружаются
+        self.in_flight = dict()
+        self.request_id = 0
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+        self.stopping = False
+
+    def request(self, block_index, sensor, wave_signature=None, pixels=None, window=None, load_waves=True, feature=None):
+        """
+        Запрос данных для монитора (вызывается из потока интерфейса)
+        :param block_index: номер монитора
+        :param sensor: имя датчика
+        :param wave_signature: подпись уже отображаемых волн
+        :param pixels: ширина графика минимумов для прореживания
+        :param window: окно истории минимумов в секундах (None - вся история)
+        :param load_waves: загружать волны (False - только минимумы)
+        :param feature: признак спектра для графика истории (None - минимум)
+        :return: номер запроса или None, если запрос дублирует выполняющийся
+        """
+        with self.lock:
+            in_flight = self.in_flight.get(block_index)
+            if in_flight and in_flight[1] == (sensor, window, feature) and block_index not in self.pending:
+                return None
+            self.request_id += 1
+            self.pending[block_index] = (self.request_id, sensor, wave_signature, pixels, window, load_waves, feature)
+            request_id = self.request_id
+
+        self.call_in_loop(lambda: self.wakeup.set())
+        return request_id
+
+    def call_in_loop(self, callback):
+        """
+        Потокобезопасный вызов функции в цикле загрузчика
+        :param callback: функция без аргументов
+        """
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:  # Цикл уже закрыт
+            pass
+
+    def load(self, block_index, request_id, sensor, wave_signature, pixels, window, load_waves, feature):
+        """
+        Загрузка данных одного монитора и отправка их в интерфейс
+        """
+        try:
+            data = self.graph_master.get_graph_data(sensor, wave_signature, pixels, window, load_waves, feature)
+        except Exception as e:
+            print(e)
+        else:
+            self.data_ready.emit(block_index, request_id, data)
+        finally:
+            with self.lock:
+                if self.in_flight.get(block_index, (None,))[0] == request_id:
+                    del self.in_flight[block_index]
+                    if block_index in self.pending:  # Запрос монитора ждал завершения этой загрузки
+                        self.call_in_loop(lambda: self.wakeup.set())
+
+    async def serve(self):
+        """
+        Обработка накопившихся запросов
+        Загрузки запускаются без ожидания завершения, запросы мониторов, которые еще загружаются,
+        остаются в очереди до конца их загрузки
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            with self.lock:
+                requests = {block_index: request for block_index, request in self.pending.items()
+                            if block_index not in self.in_flight}
+                for block_index, request in requests.items():
+                    del self.pending[block_index]
+                    self.in_flight[block_index] = (request[0], (request[1], request[4], request[6]))
+
+            for block_index, request in requests.items():
+                loop.run_in_executor(None, self.load, block_index, *request)
+
+    def run(self):
+        """
+        Запуск загрузчика в потоке
+        :return:
+        """
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.wakeup = asyncio.Event()
+        self.wakeup.set()  # Запросы могли прийти до запуска потока
+        self.task = loop.create_task(self.serve())
+        self.loop = loop
+        if self.stopping:  # stop() вызван до запуска цикла
+            self.task.cancel()
+        try:
+            loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop = None
+            loop.close()
+
+    def stop(self):
+        """
+        Остановка загрузчика
+        :return:
+        """
+
+        self.stopping = True
+        self.call_in_loop(lambda: self.task.cancel())
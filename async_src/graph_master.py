@@ -1,16 +1,65 @@
 import os
-from datetime import datetime
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
+from async_src.decimation import decimate
+from async_src.features import FEATURES, MIN_FEATURE
+from async_src.metrics import metrics
+from async_src.min_store import MinSegmentStore, read_segment
+from async_src.spectrum_cache import SpectrumCache
+from async_src.sensor_writer import read_columns
+from async_src.spectrum_store import BINARY_SUFFIX, TEXT_SUFFIX, read_spectrum, read_text_spectrum
+from async_src.sqlite_store import DB_FILE, SQLiteReader
+
+
+def sort_by_time(dates, values, times):
+    """
+    Сортировка точек по времени (строки сегментов могут быть записаны не по порядку)
+    :return: список дат, список значений, список меток времени
+    """
+    order = sorted(range(len(times)), key=times.__getitem__)
+    return [dates[i] for i in order], [values[i] for i in order], [times[i] for i in order]
+
+
+def is_sorted(times):
+    """
+    Проверка, что метки времени идут по возрастанию
+    """
+    return all(previous <= current for previous, current in zip(times, times[1:]))
+
 
 class GraphMaster:
     """
     Класс для работы с графиками
+    Данные читаются из файлов в папках датчиков (backend='files') или из общей базы SQLite (backend='sqlite')
     """
 
-    def __init__(self, path_to_dirs, sensor_directories):
+    def __init__(self, path_to_dirs, sensor_directories, decimation='minmax', spectrum_cache=None, backend='files'):
         self.path_to_dirs = path_to_dirs
         self.sensor_dirs = sensor_directories
+        self.spectrum_cache = spectrum_cache or SpectrumCache()  # Общий кэш спектров для всех мониторов
+        self.decimation = decimation  # Метод прореживания истории минимумов: 'minmax' или 'lttb'
+        self.min_views = dict()  # Последний прореженный вид минимумов по папкам датчиков
+        self.min_cache = dict()  # Состояние инкрементального чтения min_values.txt по папкам датчиков
+        self.segment_cache = dict()  # Путь к папке датчика -> разобранные сегменты истории минимумов по путям файлов
+        # Данные читаются из фонового загрузчика: у каждого датчика своя блокировка,
+        # чтобы долгий разбор истории одного датчика не задерживал остальные
+        self.sensor_locks = dict()
+        self.sensor_locks_lock = threading.Lock()
+        self.database = SQLiteReader(os.path.join(path_to_dirs, DB_FILE)) if backend == 'sqlite' else None
+
+    def sensor_lock(self, sensor_path):
+        """
+        Блокировка кэшей истории минимумов датчика
+        :param sensor_path: путь к папке датчика
+        :return: threading.Lock
+        """
+        with self.sensor_locks_lock:
+            return self.sensor_locks.setdefault(sensor_path, threading.Lock())
 
     def get_min_files(self, sensor_dir):
         """
@@ -18,39 +67,253 @@ class GraphMaster:
         :param sensor_dir: папка датчика
         :return: список дат, список значений минимумов
         """
-        with open(os.path.join(self.path_to_dirs, sensor_dir, 'min_values.txt')) as file:
-            lines = file.readlines()
-            dates = [datetime.strptime((line.split()[0]), "%Y-%m-%d;%H:%M:%S") for line in lines]
-            min_vals = [float(line.split()[1]) for line in lines]
+        dates, min_vals, _ = self.read_min_range(sensor_dir)
         return dates, min_vals
 
+    @staticmethod
+    def slice_range(dates, min_vals, times, start=None, end=None):
+        """
+        Выборка точек в диапазоне времени (точки упорядочены по времени)
+        :return: список дат, список значений минимумов, список меток времени
+        """
+        lo = bisect_left(times, start.timestamp()) if start else 0
+        hi = bisect_right(times, end.timestamp()) if end else len(times)
+        return dates[lo:hi], min_vals[lo:hi], times[lo:hi]
+
+    @staticmethod
+    def get_features():
+        """
+        Признаки спектра, которые можно вывести на графике истории
+        :return: список имен признаков, первым - минимум
+        """
+        return [MIN_FEATURE] + list(FEATURES)
+
+    def read_min_range(self, sensor_dir, start=None, end=None, feature=None):
+        """
+        Чтение истории минимумов за диапазон времени
+        В режиме sqlite выполняется запрос к базе по индексу (sensor, timestamp).
+        Если у датчика есть сегментированное хранилище, читаются только пересекающиеся с диапазоном сегменты,
+        иначе - min_values.txt
+        Признаки спектра хранятся только в min_values.txt, для базы и сегментов история признака пустая
+        :param sensor_dir: папка датчика
+        :param start: начало диапазона (datetime или None - с начала истории)
+        :param end: конец диапазона (datetime или None - до конца истории)
+        :param feature: признак спектра (None - минимум)
+        :return: список дат, список значений, список меток времени (секунды)
+        """
+        sensor_path = os.path.join(self.path_to_dirs, sensor_dir)
+        if self.database or MinSegmentStore.exists(sensor_path):
+            if feature not in (None, MIN_FEATURE):
+                return [], [], []
+            if self.database:
+                return self.database.read_minimums(sensor_dir, start, end)
+            return self.read_min_segments(sensor_path, start, end)
+        return self.read_min_files(sensor_dir, start, end, feature)
+
+    def read_min_segments(self, sensor_path, start=None, end=None):
+        """
+        Чтение сегментов истории минимумов, пересекающихся с диапазоном
+        Закрытые сегменты не меняются и берутся из кэша, текущий дочитывается инкрементально.
+        Сегмент, в который строки были записаны не по порядку времени, сортируется при чтении,
+        пересекающиеся по времени сегменты объединяются с сортировкой.
+        В кэше остаются только сегменты последнего запроса
+        :param sensor_path: путь к папке датчика
+        :return: список дат, список значений минимумов, список меток времени (секунды)
+        """
+        segments = MinSegmentStore(sensor_path).overlapping(start, end)
+        dates, min_vals, times = [], [], []
+        overlap = False  # Сегменты пересекаются по времени - результат нужно отсортировать
+        with self.sensor_lock(sensor_path):
+            segment_cache = self.segment_cache.setdefault(sensor_path, dict())
+            for path, _ in segments:
+                try:
+                    size = os.path.getsize(path)
+                except FileNotFoundError:
+                    continue
+
+                cache = segment_cache.get(path)
+                if cache is None or cache['offset'] > size:
+                    cache = {'offset': 0, 'dates': [], 'min_vals': [], 'times': []}
+                    segment_cache[path] = cache
+
+                if cache['offset'] < size:
+                    new_dates, new_vals, new_times, read = read_segment(path, cache['offset'])
+                    if not is_sorted(cache['times'][-1:] + new_times):
+                        new_dates, new_vals, new_times = sort_by_time(cache['dates'] + new_dates,
+                                                                      cache['min_vals'] + new_vals,
+                                                                      cache['times'] + new_times)
+                        cache['dates'], cache['min_vals'], cache['times'] = [], [], []
+                    cache['dates'] += new_dates
+                    cache['min_vals'] += new_vals
+                    cache['times'] += new_times
+                    cache['offset'] += read
+
+                part = self.slice_range(cache['dates'], cache['min_vals'], cache['times'], start, end)
+                if times and part[2] and part[2][0] < times[-1]:
+                    overlap = True
+                dates += part[0]
+                min_vals += part[1]
+                times += part[2]
+
+            used = {path for path, _ in segments}
+            for path in [path for path in segment_cache if path not in used]:
+                del segment_cache[path]
+        if overlap:
+            return sort_by_time(dates, min_vals, times)
+        return dates, min_vals, times
+
+    def read_min_files(self, sensor_dir, start=None, end=None, feature=None):
+        """
+        Чтение файла минимумов
+        Файл читается инкрементально: разбираются только строки, дописанные с прошлого вызова.
+        При усечении или замене файла, а также при изменении списка столбцов данные перечитываются полностью.
+        Столбцы признаков после минимума описаны в min_columns.json, отсутствующие значения - NaN
+        :param sensor_dir: папка датчика
+        :param start: начало диапазона (datetime или None)
+        :param end: конец диапазона (datetime или None)
+        :param feature: признак спектра (None - минимум)
+        :return: список дат, список значений, список меток времени (секунды)
+        """
+        sensor_path = os.path.join(self.path_to_dirs, sensor_dir)
+        path = os.path.join(sensor_path, 'min_values.txt')
+        columns = (read_columns(sensor_path) or [MIN_FEATURE])[1:]  # Столбцы после минимума
+
+        with self.sensor_lock(sensor_path), open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            cache = self.min_cache.get(sensor_dir)
+
+            if cache is not None:
+                head = file.read(len(cache['head']))
+                if stat.st_ino != cache['inode'] or stat.st_size < cache['offset'] or head != cache['head'] \
+                        or columns != cache['columns']:
+                    cache = None
+
+            if cache is None:
+                cache = {'inode': stat.st_ino, 'offset': 0, 'head': b'', 'dates': [], 'min_vals': [], 'times': [],
+                         'columns': columns, 'features': {name: [] for name in columns}}
+                self.min_cache[sensor_dir] = cache
+
+            if stat.st_size > cache['offset']:
+                file.seek(cache['offset'])
+                data = file.read(stat.st_size - cache['offset'])
+                complete = data.rfind(b'\n') + 1  # Недописанную последнюю строку оставляем до следующего вызова
+
+                for line in data[:complete].decode().splitlines():
+                    parts = line.split()
+                    if len(parts) < 2:
+                        continue
+                    date = datetime.strptime(parts[0], "%Y-%m-%d;%H:%M:%S")
+                    cache['dates'].append(date)
+                    cache['min_vals'].append(float(parts[1]))
+                    cache['times'].append(date.timestamp())
+                    for i, name in enumerate(columns, 2):
+                        cache['features'][name].append(float(parts[i]) if i < len(parts) else float('nan'))
+
+                if cache['offset'] == 0 and complete:
+                    cache['head'] = data[:data.find(b'\n') + 1]
+                cache['offset'] += complete
+
+            if feature in (None, MIN_FEATURE):
+                values = cache['min_vals']
+            elif feature in cache['features']:
+                values = cache['features'][feature]
+            else:  # Признак не записывался для этого датчика
+                return [], [], []
+            return self.slice_range(cache['dates'], values, cache['times'], start, end)
+
     def get_wave_files(self, sensor_dir):
         """
         Получение файлов с волнами
+        Бинарные файлы читаются через memmap, текстовые - построчно.
+        Если для CSV есть оба варианта, используется бинарный.
+        Разобранные спектры берутся из кэша, пока файл не изменился.
+        В режиме sqlite спектры читаются из базы
         :param sensor_dir: папка датчика
         :return: спислк волн, спислк значений
         """
+        if self.database:
+            yield from self.database.read_spectra(sensor_dir)
+            return
+
         sensor_path = Path(self.path_to_dirs) / sensor_dir
-        for filename in os.listdir(sensor_path):
-            if filename.endswith('output.txt'):
-                with open(os.path.join(self.path_to_dirs, sensor_dir, filename)) as file:
-                    lines = file.readlines()
-                    waves = [float(line.split()[0]) for line in lines]
-                    values = [float(line.split()[1]) for line in lines]
+        filenames = os.listdir(sensor_path)
+        binary_files = {filename for filename in filenames if filename.endswith(BINARY_SUFFIX)}
+        for filename in filenames:
+            if filename in binary_files:
+                reader = read_spectrum
+            elif filename.endswith(TEXT_SUFFIX) and filename[:-len(TEXT_SUFFIX)] + BINARY_SUFFIX not in binary_files:
+                reader = read_text_spectrum
+            else:
+                continue
 
-                yield waves, values
+            try:
+                yield self.spectrum_cache.load(os.path.join(sensor_path, filename), reader)
+            except FileNotFoundError:  # Файл удален сборщиком мусора
+                continue
+            except ValueError as e:  # Поврежденный файл (например, оставшийся после сбоя) не мешает остальным
+                print(f'Error: failed to read {filename} ({e})')
+                continue
 
-    def get_min_data(self, sensor):
+    def get_wave_signature(self, sensor):
+        """
+        Подпись файлов с волнами датчика для проверки, изменились ли данные
+        :param sensor: имя датчика
+        :return: кортеж (имя файла, размер, время изменения) по всем файлам спектров
+        """
+        for sensor_dir in self.sensor_dirs:
+            if sensor in sensor_dir:
+                if self.database:
+                    return self.database.spectra_signature(sensor_dir)
+                with os.scandir(os.path.join(self.path_to_dirs, sensor_dir)) as entries:
+                    return tuple(sorted(
+                        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns) for entry in entries
+                        if entry.name.endswith((TEXT_SUFFIX, BINARY_SUFFIX))
+                    ))
+        return ()
+
+    def get_min_data(self, sensor, start=None, end=None, feature=None):
         """
         Получение значений для графика минимумов
         :param sensor: имя датчика
+        :param start: начало диапазона (datetime или None - с начала истории)
+        :param end: конец диапазона (datetime или None - до конца истории)
+        :param feature: признак спектра (None - минимум)
         :return: список дат, список значений минимумов
         """
         for sensor_dir in self.sensor_dirs:
             if sensor in sensor_dir:
-                dates, min_vals = self.get_min_files(sensor_dir)
+                dates, min_vals, _ = self.read_min_range(sensor_dir, start, end, feature)
                 return dates, min_vals
 
+    def get_min_view(self, sensor, pixels, start=None, end=None, feature=None):
+        """
+        Получение прореженных значений для графика минимумов шириной pixels
+        Прореживание пересчитывается, только если изменились данные, диапазон или ширина графика
+        :param sensor: имя датчика
+        :param pixels: ширина графика в пикселях
+        :param start: начало диапазона (datetime или None)
+        :param end: конец диапазона (datetime или None)
+        :param feature: признак спектра (None - минимум)
+        :return: список дат, список значений минимумов, количество точек до прореживания
+        """
+        for sensor_dir in self.sensor_dirs:
+            if sensor in sensor_dir:
+                dates, min_vals, times = self.read_min_range(sensor_dir, start, end, feature)
+                key = (len(dates), dates[0] if dates else None, dates[-1] if dates else None, pixels, feature)
+
+                view = self.min_views.get(sensor_dir)
+                if view is None or view[0] != key:
+                    indices = []
+                    if dates:
+                        # Строки без значения признака (NaN) не выводятся и не участвуют в прореживании
+                        values = np.asarray(min_vals, dtype=np.float64)
+                        present = np.flatnonzero(~np.isnan(values))
+                        indices = present[decimate(np.asarray(times)[present], values[present], pixels,
+                                                   self.decimation)]
+                    view = (key, [dates[i] for i in indices], [min_vals[i] for i in indices])
+                    self.min_views[sensor_dir] = view
+                return view[1], view[2], len(dates)
+
     def get_wave_data(self, sensor):
         """
         Получение значений для графика волн
@@ -61,3 +324,38 @@ class GraphMaster:
             if sensor in sensor_dir:
                 yield from self.get_wave_files(sensor_dir)
                 break
+
+    def get_graph_data(self, sensor, wave_signature=None, pixels=None, window=None, load_waves=True, feature=None):
+        """
+        Подготовка данных для графиков одного монитора
+        Волны читаются, только если их подпись отличается от wave_signature
+        :param sensor: имя датчика
+        :param wave_signature: подпись уже отображаемых волн
+        :param pixels: ширина графика минимумов для прореживания (None - без прореживания)
+        :param window: окно истории минимумов в секундах до текущего момента (None - вся история)
+        :param load_waves: загружать волны (False - только минимумы, для обзора)
+        :param feature: признак спектра для графика истории (None - минимум)
+        :return: словарь с датами, минимумами, подписью волн и волнами (None, если не изменились)
+        """
+        start = datetime.now() - timedelta(seconds=window) if window else None
+        with metrics.timer('load_min', sensor):
+            if pixels:
+                dates, min_vals, min_count = self.get_min_view(sensor, pixels, start, feature=feature)
+            else:
+                dates, min_vals = self.get_min_data(sensor, start, feature=feature)
+                min_count = len(dates)
+
+        signature, waves = wave_signature, None
+        if load_waves:
+            with metrics.timer('load_waves', sensor):
+                signature = (sensor, self.get_wave_signature(sensor))
+                if signature != wave_signature:
+                    # Кэш хранит копии в памяти, поэтому чтение с диска не происходит позже в потоке интерфейса
+                    waves = list(self.get_wave_data(sensor))
+
+        cache_stats = self.spectrum_cache.stats()
+        for name in ('hits', 'misses', 'bytes'):
+            metrics.set_gauge(f'spectrum_cache_{name}', cache_stats[name])
+
+        return {'sensor': sensor, 'window': window, 'feature': feature, 'dates': dates, 'min_vals': min_vals, 'min_count': min_count,
+                'wave_signature': signature, 'waves': waves}
@@ -0,0 +1,81 @@
+import os
+import json
+import asyncio
+import aiofiles
+from aiofiles import os as aos
+
+MANIFEST_FILE = '.processed_manifest.json'  # Имя файла манифеста в папке датчика
+
+
+class ProcessedManifest:
+    """
+    Манифест обработанных файлов датчика
+    Хранится в папке датчика: имя файла -> [размер, время изменения]
+    """
+
+    def __init__(self, sensor_dir):
+        self.path = os.path.join(sensor_dir, MANIFEST_FILE)
+        self.entries = self.load()
+        self.save_lock = asyncio.Lock()  # Файлы датчика могут обрабатываться параллельно
+
+    def load(self):
+        """
+        Загрузка манифеста с диска
+        :return: словарь записей манифеста
+        """
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict()
+        return entries if isinstance(entries, dict) else dict()
+
+    @staticmethod
+    def signature(stat):
+        """
+        Подпись файла для манифеста
+        :param stat: результат os.stat
+        :return: [размер, время изменения в наносекундах]
+        """
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_processed(self, filename, stat):
+        """
+        Проверка, что файл уже обработан и не изменился с тех пор
+        :param filename: имя файла
+        :param stat: результат os.stat для файла
+        """
+        return self.entries.get(filename) == self.signature(stat)
+
+    async def mark_processed(self, filename, stat, save=True):
+        """
+        Добавление файла в манифест и сохранение на диск
+        :param filename: имя файла
+        :param stat: результат os.stat для файла
+        :param save: сразу записать манифест на диск
+        """
+        self.entries[filename] = self.signature(stat)
+        if save:
+            await self.save()
+
+    async def prune(self, filenames):
+        """
+        Удаление из манифеста файлов, которых больше нет в папке
+        :param filenames: имена файлов, существующих в папке
+        """
+        existing = set(filenames)
+        stale = [filename for filename in self.entries if filename not in existing]
+        if stale:
+            for filename in stale:
+                del self.entries[filename]
+            await self.save()
+
+    async def save(self):
+        """
+        Атомарная запись манифеста: во временный файл, затем замена
+        """
+        async with self.save_lock:
+            tmp_path = f'{self.path}.tmp'
+            async with aiofiles.open(tmp_path, 'w') as file:
+                await file.write(json.dumps(self.entries))
+            await aos.replace(tmp_path, self.path)
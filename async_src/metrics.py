@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+PREFIX = 'sensor_monitor'  # Префикс имен метрик в формате Prometheus
+QUANTILES = (0.5, 0.99)
+
+
+def percentile(values, quantile):
+    """
+    Перцентиль по отсортированному списку (метод ближайшего ранга)
+    :param values: отсортированный список значений
+    :param quantile: квантиль от 0 до 1
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(quantile * len(values)))]
+
+
+class Metrics:
+    """
+    Класс для сбора метрик: длительности этапов, счетчики и текущие значения
+    Для длительностей хранится скользящее окно последних замеров, из которого считаются перцентили.
+    Ключ метрики - (имя, датчик), датчик может быть пустым
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.lock = threading.Lock()
+        self.timings = defaultdict(lambda: deque(maxlen=self.window))
+        self.timing_totals = defaultdict(lambda: [0, 0.0])  # Ключ -> [количество, сумма] за все время
+        self.counters = defaultdict(float)
+        self.gauges = dict()
+        self.arrivals = dict()  # Датчик -> [время появления самого старого не показанного файла, число файлов]
+
+    @contextmanager
+    def timer(self, stage, sensor=''):
+        """
+        Замер длительности этапа
+        :param stage: название этапа
+        :param sensor: имя датчика
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, sensor)
+
+    def observe(self, stage, seconds, sensor=''):
+        """
+        Добавление замера длительности
+        """
+        with self.lock:
+            self.timings[(stage, sensor)].append(seconds)
+            totals = self.timing_totals[(stage, sensor)]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def increment(self, name, value=1, sensor=''):
+        """
+        Увеличение счетчика
+        """
+        with self.lock:
+            self.counters[(name, sensor)] += value
+
+    def set_gauge(self, name, value, sensor=''):
+        """
+        Установка текущего значения (например, глубины очереди)
+        """
+        with self.lock:
+            self.gauges[(name, sensor)] = value
+
+    def record_arrival(self, sensor, arrived_at):
+        """
+        Файл датчика обработан: запоминаем время его появления до отображения на графике
+        Хранится только самое старое время и число файлов, поэтому память не растет,
+        пока датчик не выбран ни в одном мониторе
+        :param sensor: имя датчика
+        :param arrived_at: время появления файла (time.time())
+        """
+        with self.lock:
+            pending = self.arrivals.get(sensor)
+            if pending is None:
+                self.arrivals[sensor] = [arrived_at, 1]
+            else:
+                pending[0] = min(pending[0], arrived_at)
+                pending[1] += 1
+
+    def record_plotted(self, sensor):
+        """
+        Данные датчика показаны на графике: задержка от появления самого старого из показанных файлов
+        до отрисовки (худший случай по файлам), число показанных файлов - в счетчике files_plotted
+        :param sensor: имя датчика
+        """
+        now = time.time()
+        with self.lock:
+            pending = self.arrivals.pop(sensor, None)
+        if pending is not None:
+            self.observe('arrival_to_plot', max(now - pending[0], 0.0), sensor)
+            self.increment('files_plotted', pending[1], sensor)
+
+    def snapshot(self):
+        """
+        Текущее состояние метрик
+        :return: словарь, пригодный для JSON
+        """
+        with self.lock:
+            timings = {key: sorted(values) for key, values in self.timings.items()}
+            totals = {key: tuple(value) for key, value in self.timing_totals.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+        return {
+            'timestamp': time.time(),
+            'stages': [
+                {'stage': stage, 'sensor': sensor, 'count': totals[(stage, sensor)][0],
+                 'sum': totals[(stage, sensor)][1],
+                 **{f'p{int(q * 100)}': percentile(values, q) for q in QUANTILES}}
+                for (stage, sensor), values in sorted(timings.items())
+            ],
+            'counters': [{'name': name, 'sensor': sensor, 'value': value}
+                         for (name, sensor), value in sorted(counters.items())],
+            'gauges': [{'name': name, 'sensor': sensor, 'value': value}
+                       for (name, sensor), value in sorted(gauges.items())],
+        }
+
+    def to_prometheus(self):
+        """
+        Метрики в текстовом формате Prometheus
+        :return: строка
+        """
+        snapshot = self.snapshot()
+        lines = [f'# TYPE {PREFIX}_stage_seconds summary']
+        for stage in snapshot['stages']:
+            labels = f'stage="{stage["stage"]}",sensor="{stage["sensor"]}"'
+            for q in QUANTILES:
+                lines.append(f'{PREFIX}_stage_seconds{{{labels},quantile="{q}"}} {stage[f"p{int(q * 100)}"]}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{{labels}}} {stage["sum"]}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{{labels}}} {stage["count"]}')
+
+        for kind, suffix, items in (('counter', '_total', snapshot['counters']), ('gauge', '', snapshot['gauges'])):
+            declared = set()
+            for item in items:
+                name = f'{PREFIX}_{item["name"]}{suffix}'
+                if name not in declared:  # Строка TYPE - один раз на семейство метрик
+                    lines.append(f'# TYPE {name} {kind}')
+                    declared.add(name)
+                lines.append(f'{name}{{sensor="{item["sensor"]}"}} {item["value"]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """
+        Атомарная запись метрик в файл: .json - JSON, иначе формат Prometheus
+        :param path: путь к файлу
+        """
+        if path.endswith('.json'):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+    def summary(self, stages=('parse', 'draw_min', 'arrival_to_plot')):
+        """
+        Короткая сводка для строки состояния
+        :param stages: этапы, по которым выводятся p50/p99 (по всем датчикам)
+        :return: строка
+        """
+        with self.lock:
+            merged = defaultdict(list)
+            for (stage, _), values in self.timings.items():
+                if stage in stages:
+                    merged[stage].extend(values)
+            queued = sum(value for (name, _), value in self.gauges.items() if name == 'queue_depth')
+
+        parts = []
+        for stage in stages:
+            values = sorted(merged.get(stage, []))
+            if values:
+                parts.append(f'{stage} p50 {percentile(values, 0.5) * 1000:.1f} ms, '
+                             f'p99 {percentile(values, 0.99) * 1000:.1f} ms')
+        parts.append(f'queued files {queued:g}')
+        return ' | '.join(parts)
+
+
+metrics = Metrics()  # Общий реестр метрик процесса
@@ -0,0 +1,155 @@
+import os
+import json
+from datetime import datetime
+
+from async_src.sensor_writer import write_file
+
+SEGMENT_DIR = 'min_segments'  # Папка сегментов внутри папки датчика
+INDEX_FILE = 'index.json'  # Индекс сегментов: диапазон времени и min/max значений
+ROLL_MODES = ('day', 'size')  # Новый сегмент каждый день (и при превышении размера) или только по размеру
+DATE_FORMAT = '%Y-%m-%d;%H:%M:%S'  # Формат даты, как в min_values.txt
+
+
+class MinSegmentStore:
+    """
+    Сегментированное хранилище истории минимумов датчика
+    Строки пишутся в формате min_values.txt в файлы min_segments/<начало сегмента>.txt,
+    для каждого сегмента в index.json хранятся диапазон времени, min/max значений, число строк и размер.
+    Строки копятся в памяти и записываются пакетом через SensorWriter датчика, индекс обновляется один раз на пакет
+    """
+
+    def __init__(self, sensor_dir, roll='day', max_segment_bytes=8 * 1024 * 1024):
+        if roll not in ROLL_MODES:
+            raise ValueError(f'Unknown segment roll mode: {roll}')
+
+        self.path = os.path.join(sensor_dir, SEGMENT_DIR)
+        self.index_path = os.path.join(self.path, INDEX_FILE)
+        self.roll = roll
+        self.max_segment_bytes = max_segment_bytes
+        self.segments = None  # Загружаются при первом обращении
+        self.pending = dict()  # Имя сегмента -> строки, еще не записанные на диск
+
+    @staticmethod
+    def exists(sensor_dir):
+        """
+        Проверка, что в папке датчика есть сегментированная история
+        :param sensor_dir: путь к папке датчика
+        """
+        return os.path.exists(os.path.join(sensor_dir, SEGMENT_DIR, INDEX_FILE))
+
+    def load_index(self):
+        """
+        Чтение индекса сегментов
+        :return: список сегментов по возрастанию времени
+        """
+        try:
+            with open(self.index_path) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def overlapping(self, start=None, end=None):
+        """
+        Сегменты, пересекающиеся с диапазоном времени
+        :param start: начало диапазона (datetime или None)
+        :param end: конец диапазона (datetime или None)
+        :return: список (путь к файлу сегмента, запись индекса) по возрастанию начала сегмента
+        """
+        start_ts = start.timestamp() if start else float('-inf')
+        end_ts = end.timestamp() if end else float('inf')
+        segments = sorted(self.load_index(), key=lambda segment: segment['start'])
+        return [(os.path.join(self.path, segment['name']), segment) for segment in segments
+                if segment['end'] >= start_ts and segment['start'] <= end_ts]
+
+    def find_segment(self, date):
+        """
+        Сегмент для записи с датой date
+        В режиме day это последний сегмент того же дня (записи пакетной обработки могут приходить не по порядку
+        времени), в режиме size - последний сегмент
+        :return: запись индекса или None, если нужно начать новый сегмент
+        """
+        for segment in reversed(self.segments):
+            if self.roll == 'day' and datetime.fromtimestamp(segment['start']).date() != date.date():
+                continue
+            return segment if segment['bytes'] < self.max_segment_bytes else None
+        return None
+
+    def add(self, date, value):
+        """
+        Добавление минимума в сегмент (выполняется в цикле событий, без обращения к диску)
+        Индекс обновляется в памяти, строка копится до write
+        :param date: время минимума (datetime)
+        :param value: значение минимума
+        :return: размер строки в байтах
+        """
+        if self.segments is None:
+            self.segments = self.load_index()
+
+        segment = self.find_segment(date)
+        if segment is None:
+            name = f"{date.strftime('%Y%m%d-%H%M%S')}_{len(self.segments)}.txt"
+            segment = {'name': name, 'start': date.timestamp(), 'end': date.timestamp(),
+                       'min': value, 'max': value, 'count': 0, 'bytes': 0}
+            self.segments.append(segment)
+
+        value = float(value)
+        data = f'{date.strftime(DATE_FORMAT)} {value}\n'.encode()
+        self.pending.setdefault(segment['name'], []).append(data)
+
+        segment['start'] = min(segment['start'], date.timestamp())
+        segment['end'] = max(segment['end'], date.timestamp())
+        segment['min'] = min(segment['min'], value)
+        segment['max'] = max(segment['max'], value)
+        segment['count'] += 1
+        segment['bytes'] += len(data)
+        return len(data)
+
+    def take_pending(self):
+        """
+        Забрать накопленные строки и снимок индекса для записи (выполняется в цикле событий)
+        :return: словарь имя сегмента -> строки (bytes) и содержимое индекса (bytes); (None, None), если писать нечего
+        """
+        if not self.pending:
+            return None, None
+        pending, self.pending = self.pending, dict()
+        return {name: b''.join(lines) for name, lines in pending.items()}, json.dumps(self.segments).encode()
+
+    def write(self, pending, index, sync=False):
+        """
+        Дописывание строк в файлы сегментов и атомарная замена индекса (выполняется в пуле потоков)
+        Индекс записывается после строк, поэтому не ссылается на данные, которых еще нет на диске
+        :param pending: словарь имя сегмента -> строки (bytes)
+        :param index: содержимое индекса (bytes)
+        :param sync: выполнить fsync файлов сегментов и индекса
+        """
+        os.makedirs(self.path, exist_ok=True)
+        for name, data in pending.items():
+            with open(os.path.join(self.path, name), 'ab', buffering=0) as file:
+                file.write(data)
+                if sync:
+                    os.fsync(file.fileno())
+        write_file(self.index_path, index, sync)
+
+
+def read_segment(path, offset=0):
+    """
+    Разбор файла сегмента начиная с offset (недописанная последняя строка пропускается)
+    :param path: путь к файлу сегмента
+    :param offset: смещение в байтах, с которого читать
+    :return: список дат, список значений, список меток времени, размер разобранной части в байтах
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        data = file.read()
+    end = data.rfind(b'\n') + 1
+
+    dates, values, times = [], [], []
+    for line in data[:end].decode().splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        date = datetime.strptime(parts[0], DATE_FORMAT)
+        dates.append(date)
+        values.append(float(parts[1]))
+        times.append(date.timestamp())
+    return dates, values, times, end
@@ -0,0 +1,566 @@
+import os
+import time
+import heapq
+import asyncio
+import aiofiles
+import aiocsv
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from async_src.dir_watcher import InotifyWatcher
+from async_src.features import MIN_FEATURE, extract_features, validate_features
+from async_src.manifest import ProcessedManifest
+from async_src.metrics import metrics
+from async_src.min_store import MinSegmentStore
+from async_src.sensor_writer import SensorWriter, merge_columns, read_columns
+from async_src.spectrum_parser import (
+    CHUNK_ROWS, HEADER_ROWS, parse_spectrum, find_min_wave, encode_spectrum, ingest_spectrum_file,
+    stream_spectrum_file
+)
+from async_src.spectrum_store import pack_spectrum
+from async_src.sqlite_store import DB_FILE, SQLiteWriter
+
+PARSE_ENGINES = ('numpy', 'aiocsv')  # Доступные движки разбора CSV
+WATCH_MODES = ('auto', 'inotify', 'poll')  # Режимы отслеживания новых файлов
+INGEST_MODES = ('async', 'process')  # Разбор в цикле asyncio или в пуле процессов
+OUTPUT_FORMATS = ('text', 'binary')  # Формат файлов спектров: _output.txt или _output.bin
+MIN_STORAGES = ('text', 'segmented')  # История минимумов: min_values.txt или сегменты с индексом
+BACKENDS = ('files', 'sqlite')  # Хранение результатов: файлы в папках датчиков или общая база SQLite
+PRIORITIES = ('oldest', 'newest')  # Порядок обработки накопившихся файлов датчика
+
+
+class FileProcessor:
+    """
+    Класс для обработки файлов датчиков
+    Не зависит от Qt, поэтому используется и в интерфейсе, и в пакетной обработке
+    """
+
+    def __init__(self, path_to_dirs, sensor_dirs, parse_engine='numpy', watch_mode='auto',
+                 poll_interval=5, reconcile_interval=60, ingest_mode='async', workers=None, output_format='text',
+                 retention_index=None, min_storage='text', segment_roll='day', segment_bytes=8 * 1024 * 1024,
+                 backend='files', batch_size=100, flush_interval=1.0, workers_per_sensor=1, max_concurrency=None,
+                 queue_size=64, priority='oldest', write_flush_bytes=64 * 1024, fsync='never', streaming=False,
+                 chunk_rows=CHUNK_ROWS, features=()):
+        if parse_engine not in PARSE_ENGINES:
+            raise ValueError(f'Unknown parse engine: {parse_engine}')
+        if watch_mode not in WATCH_MODES:
+            raise ValueError(f'Unknown watch mode: {watch_mode}')
+        if ingest_mode not in INGEST_MODES:
+            raise ValueError(f'Unknown ingest mode: {ingest_mode}')
+        if ingest_mode == 'process' and parse_engine != 'numpy':
+            raise ValueError('Process ingest mode requires the numpy parse engine')
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format: {output_format}')
+        if min_storage not in MIN_STORAGES:
+            raise ValueError(f'Unknown min storage: {min_storage}')
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown storage backend: {backend}')
+        if priority not in PRIORITIES:
+            raise ValueError(f'Unknown queue priority: {priority}')
+        if streaming and backend == 'sqlite':
+            raise ValueError('Streaming mode writes spectrum files and is not available with the sqlite backend')
+        validate_features(features)
+        if features and (streaming or backend == 'sqlite' or min_storage == 'segmented'):
+            raise ValueError('Spectrum features are written to min_values.txt and require the files backend, '
+                             'text min storage and non-streaming mode')
+
+        self.path_to_dirs = path_to_dirs
+        self.sensor_dirs = sensor_dirs
+        self.output_format = output_format
+        self.output_file = 'output.txt' if output_format == 'text' else 'output.bin'
+        self.parse_engine = parse_engine
+        # Статистика по движкам для сравнения пропускной способности
+        self.parse_stats = {engine: {'files': 0, 'bytes': 0, 'seconds': 0.0} for engine in PARSE_ENGINES}
+
+        self.watch_mode = watch_mode
+        self.poll_interval = poll_interval  # Интервал опроса папок в режиме poll (секунды)
+        self.reconcile_interval = reconcile_interval  # Интервал страховочной сверки в режиме inotify (секунды)
+        self.watcher = None
+
+        self.ingest_mode = ingest_mode
+        self.workers = workers or os.cpu_count()  # Количество процессов в режиме process
+        self.executor = None
+
+        self.retention_index = retention_index  # Индекс обработанных файлов для сборщика мусора
+
+        self.min_storage = min_storage
+        self.segment_roll = segment_roll  # Когда начинать новый сегмент: 'day' или 'size'
+        self.segment_bytes = segment_bytes  # Максимальный размер сегмента в байтах
+
+        # Буферизованная запись файлов датчиков; накопленные данные записываются не реже раза в flush_interval
+        self.flush_interval = flush_interval
+        self.write_flush_bytes = write_flush_bytes  # Размер накопленных строк минимумов, после которого они пишутся
+        self.fsync = fsync  # 'never', 'batch' или 'always'
+        self.writers = dict()  # SensorWriter по папкам датчиков
+        self.write_executor = None
+
+        # Потоковый режим: файл разбирается блоками по chunk_rows строк, память не зависит от размера файла
+        self.streaming = streaming
+        self.chunk_rows = chunk_rows
+
+        # Признаки спектра, которые пишутся дополнительными столбцами min_values.txt после минимума
+        self.features = tuple(features)
+
+        self.backend = backend
+        # В режиме sqlite минимумы и спектры пишутся пакетами в базу вместо файлов
+        self.database = SQLiteWriter(os.path.join(path_to_dirs, DB_FILE), batch_size) \
+            if backend == 'sqlite' else None
+
+        # Конвейер обработки: поиск файлов -> ограниченная очередь датчика -> обработчики
+        self.workers_per_sensor = workers_per_sensor  # Обработчиков очереди на каждый датчик
+        self.max_concurrency = max_concurrency or os.cpu_count()  # Одновременно обрабатываемых файлов всего
+        self.queue_size = queue_size  # Размер очереди датчика
+        self.priority = priority  # 'newest' - новые файлы первыми, чтобы графики не отставали от накопленных
+        self.ingest_limit = None  # Общий семафор, создается в цикле обработки
+
+    @staticmethod
+    async def read_numpy(path):
+        """
+        Чтение файла целиком и векторизованный разбор
+        :param path: путь к CSV-файлу
+        :return: массив длин волн, массив значений, размер файла в байтах
+        """
+        async with aiofiles.open(path, 'rb') as file:
+            data = await file.read()
+
+        wave, values = parse_spectrum(data)
+        return wave, values, len(data)
+
+    @staticmethod
+    async def read_aiocsv(path):
+        """
+        Построчное чтение файла через aiocsv
+        :param path: путь к CSV-файлу
+        :return: массив длин волн, массив значений, размер файла в байтах
+        """
+        async with aiofiles.open(path, 'r') as file:
+            wave, values = [], []
+
+            reader = aiocsv.AsyncReader(file)
+            for _ in range(HEADER_ROWS):
+                await reader.__anext__()
+
+            async for row in reader:
+                wave.append((float(row[0])))
+                values.append(float(row[1].strip()))
+
+        return np.array(wave, dtype=np.float64), np.array(values, dtype=np.float64), os.path.getsize(path)
+
+    async def read_spectrum(self, path, engine=None):
+        """
+        Чтение спектра выбранным движком в цикле событий
+        Если numpy не смог разобрать файл - повторяем через aiocsv
+        :param path: путь к CSV-файлу
+        :param engine: движок разбора (None - self.parse_engine)
+        :return: массив длин волн, массив значений, длина волны минимума, список признаков
+        """
+        engine = engine or self.parse_engine
+        start = time.perf_counter()
+        try:
+            if engine == 'numpy':
+                wave, values, size = await self.read_numpy(path)
+            else:
+                wave, values, size = await self.read_aiocsv(path)
+        except ValueError as e:
+            if engine == 'aiocsv':
+                raise
+            print(f'Error: numpy engine failed on {path} ({e}), falling back to aiocsv')
+            engine = 'aiocsv'
+            start = time.perf_counter()
+            wave, values, size = await self.read_aiocsv(path)
+
+        self.add_parse_stats(engine, size, start)
+        return wave, values, find_min_wave(wave, values), extract_features(wave, values, self.features)
+
+    def add_parse_stats(self, engine, size, start):
+        """
+        Учет разобранного файла в статистике движка
+        :param engine: движок разбора
+        :param size: размер CSV-файла в байтах
+        :param start: время начала разбора (time.perf_counter)
+        """
+        stats = self.parse_stats[engine]
+        stats['files'] += 1
+        stats['bytes'] += size
+        stats['seconds'] += time.perf_counter() - start
+
+    def get_parse_throughput(self):
+        """
+        Пропускная способность движков разбора
+        :return: словарь {движок: {'files_per_s': ..., 'mb_per_s': ...}}
+        """
+        throughput = {}
+        for engine, stats in self.parse_stats.items():
+            seconds = stats['seconds'] or float('inf')
+            throughput[engine] = {
+                'files_per_s': stats['files'] / seconds,
+                'mb_per_s': stats['bytes'] / 1024 / 1024 / seconds,
+            }
+        return throughput
+
+    def get_writer(self, path_to_dir):
+        """
+        Буферизованный писатель файлов датчика
+        :param path_to_dir: путь к папке датчика
+        :return: SensorWriter
+        """
+        writer = self.writers.get(path_to_dir)
+        if writer is None:
+            if self.write_executor is None:
+                self.write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='sensor_writer')
+            columns = None
+            if self.features:
+                columns = merge_columns(read_columns(path_to_dir), (MIN_FEATURE,) + self.features)
+            min_store = None
+            if self.min_storage == 'segmented':
+                min_store = MinSegmentStore(path_to_dir, self.segment_roll, self.segment_bytes)
+            writer = SensorWriter(path_to_dir, self.write_executor, self.write_flush_bytes, self.fsync, columns,
+                                  min_store)
+            self.writers[path_to_dir] = writer
+        return writer
+
+    async def process_file(self, path_to_dir, filename, date=None):
+        """
+        Работа с одним файлом
+        Вывод - данные в файле output.txt (или output.bin в бинарном формате), в режиме sqlite - строки в базе
+        path_to_dir: Путь к директории датчика
+        filename: Название файла
+        date: Время строки минимума (None - текущее время; пакетная обработка передает время изменения файла)
+        :return: размер записанного файла спектра в байтах
+        """
+        sensor = os.path.basename(path_to_dir)
+        path = os.path.join(path_to_dir, filename)
+        date = date or datetime.now()
+        if self.streaming:
+            return await self.stream_file(path_to_dir, filename, date)
+
+        engine = None
+        if self.executor:
+            try:
+                return await self.ingest_file(path_to_dir, filename, date)
+            except ValueError as e:
+                print(f'Error: numpy engine failed on {path} ({e}), falling back to aiocsv')
+                engine = 'aiocsv'
+
+        with metrics.timer('parse', sensor):
+            wave, values, min_wave, feature_values = await self.read_spectrum(path, engine)
+
+        if self.database:
+            with metrics.timer('db_append', sensor):
+                data = pack_spectrum(wave, values)
+                await self.database.add(sensor, date, min_wave, filename, data)
+            metrics.increment('files_processed', sensor=sensor)
+            return len(data)
+
+        writer = self.get_writer(path_to_dir)
+        with metrics.timer('min_append', sensor):
+            await self.append_min(writer, date, min_wave, feature_values)
+
+        with metrics.timer('output_write', sensor):
+            data = encode_spectrum(wave, values, self.output_format)
+            await writer.write_output(f'{filename}_{self.output_file}', data)
+        metrics.increment('files_processed', sensor=sensor)
+        return len(data)
+
+    async def ingest_file(self, path_to_dir, filename, date):
+        """
+        Работа с одним файлом в режиме process
+        Разбор, поиск минимума, признаки, кодирование и запись файла спектра выполняются одним вызовом
+        в пуле процессов (см. ingest_spectrum_file), в цикл событий возвращаются только минимум и признаки
+        (в режиме sqlite - еще содержимое спектра для базы)
+        path_to_dir: Путь к директории датчика
+        filename: Название файла
+        date: Время строки минимума
+        :return: размер записанного файла спектра в байтах
+        """
+        sensor = os.path.basename(path_to_dir)
+        output_path = None if self.database else os.path.join(path_to_dir, f'{filename}_{self.output_file}')
+        output_format = 'binary' if self.database else self.output_format
+
+        start = time.perf_counter()
+        with metrics.timer('parse', sensor):  # В режиме process этап включает запись файла спектра
+            min_wave, size, feature_values, output = await asyncio.get_running_loop().run_in_executor(
+                self.executor, ingest_spectrum_file, os.path.join(path_to_dir, filename), output_path,
+                output_format, self.features, self.fsync != 'never')
+        self.add_parse_stats('numpy', size, start)
+
+        if self.database:
+            with metrics.timer('db_append', sensor):
+                await self.database.add(sensor, date, min_wave, filename, output)
+            metrics.increment('files_processed', sensor=sensor)
+            return len(output)
+
+        with metrics.timer('min_append', sensor):
+            await self.append_min(self.get_writer(path_to_dir), date, min_wave, feature_values)
+        metrics.increment('files_processed', sensor=sensor)
+        return output
+
+    async def append_min(self, writer, date, min_wave, feature_values=()):
+        """
+        Добавление минимума (и признаков) в историю датчика
+        :param writer: SensorWriter датчика
+        :param date: время минимума
+        :param min_wave: длина волны минимума
+        :param feature_values: значения признаков в порядке self.features
+        """
+        if self.min_storage == 'segmented':
+            await writer.append_segment(date, min_wave)
+            return
+
+        computed = dict(zip(self.features, feature_values))
+        columns = ''.join(f" {computed.get(name, float('nan'))}" for name in (writer.columns or [])[1:])
+        await writer.append_min(f"{date.strftime('%Y-%m-%d;%H:%M:%S')} {min_wave}{columns}\n")
+
+    async def stream_file(self, path_to_dir, filename, date):
+        """
+        Работа с одним файлом в потоковом режиме
+        Разбор, поиск минимума и запись файла спектра выполняются блоками в пуле процессов (режим process)
+        или в пуле потоков записи
+        path_to_dir: Путь к директории датчика
+        filename: Название файла
+        date: Время строки минимума
+        :return: размер записанного файла спектра в байтах
+        """
+        sensor = os.path.basename(path_to_dir)
+        writer = self.get_writer(path_to_dir)
+        loop = asyncio.get_running_loop()
+
+        start = time.perf_counter()
+        with metrics.timer('stream', sensor):
+            min_wave, size, output_size = await loop.run_in_executor(
+                self.executor or self.write_executor, stream_spectrum_file, os.path.join(path_to_dir, filename),
+                os.path.join(path_to_dir, f'{filename}_{self.output_file}'), self.output_format, self.chunk_rows,
+                self.fsync != 'never')
+        self.add_parse_stats('numpy', size, start)
+
+        with metrics.timer('min_append', sensor):
+            await self.append_min(writer, date, min_wave)
+        metrics.increment('files_processed', sensor=sensor)
+        return output_size
+
+    async def handle_file(self, sensor_dir, filename, processed_files, manifest):
+        """
+        Обработка найденного файла, если он еще не обработан
+        sensor_dir: Путь к директории датчика
+        filename: Название файла
+        processed_files: Подписи файлов, уже обработанных в этом запуске (измененный файл обрабатывается снова)
+        manifest: Манифест обработанных файлов датчика
+        """
+        if not filename.lower().endswith('.csv'):
+            return
+
+        try:
+            stat = os.stat(os.path.join(sensor_dir, filename))
+        except FileNotFoundError:
+            return
+        signature = ProcessedManifest.signature(stat)
+        if processed_files.get(filename) == signature:
+            return
+
+        output_size = 0
+        if not manifest.is_processed(filename, stat):
+            output_size = await self.process_file(sensor_dir, filename)
+            # Файл отмечается в манифесте после записи его данных в базу или файл минимумов
+            (self.database or self.get_writer(sensor_dir)).defer_mark(manifest, filename, stat)
+            metrics.record_arrival(os.path.basename(sensor_dir), stat.st_mtime)
+        if self.retention_index is not None:
+            self.retention_index.register(sensor_dir, filename, stat.st_mtime, stat.st_size + output_size)
+        processed_files[filename] = signature
+
+    def queue_key(self, entry_stat, filename):
+        """
+        Приоритет файла в очереди обработки: меньше - раньше
+        :param entry_stat: результат os.stat для файла
+        :param filename: имя файла
+        """
+        mtime = entry_stat.st_mtime_ns
+        return (-mtime if self.priority == 'newest' else mtime), filename
+
+    async def consume(self, sensor_dir, queue, room, seen, processed_files, manifest):
+        """
+        Обработчик очереди датчика
+        Одновременно обрабатывается не больше max_concurrency файлов по всем датчикам.
+        Файл, который не удалось обработать (например, недописанный), убирается из seen,
+        чтобы его снова нашли событие или сверка папки
+        sensor_dir: Путь к директории датчика
+        queue: Очередь (приоритет, имя файла)
+        room: Событие, сообщающее поставщику о свободном месте в очереди
+        seen: Подписи файлов, уже переданных на обработку
+        """
+        while True:
+            _, filename = await queue.get()
+            room.set()
+            try:
+                async with self.ingest_limit:
+                    await self.handle_file(sensor_dir, filename, processed_files, manifest)
+            except Exception as e:
+                seen.pop(filename, None)
+                print(f'Error: failed to process {os.path.join(sensor_dir, filename)} ({e})')
+            finally:
+                queue.task_done()
+
+    async def get_files(self, sensor_dir):
+        """
+        Поиск файлов и передача их обработчикам
+        Найденные файлы копятся в списке ожидания и передаются в ограниченную очередь датчика
+        в порядке приоритета (старые или новые первыми), очередь разбирают workers_per_sensor обработчиков.
+        Обработанные файлы сохраняются в манифест, чтобы не обрабатывать их повторно после перезапуска.
+        При каждой сверке из манифеста и списков запуска удаляются файлы, которых больше нет в папке
+        В режиме inotify файлы обрабатываются по событиям, а полная сверка папки выполняется раз в reconcile_interval
+        sensor_dir: Путь к директории датчика
+        """
+        processed_files = dict()
+        manifest = ProcessedManifest(sensor_dir)
+        if self.ingest_limit is None:
+            self.ingest_limit = asyncio.Semaphore(self.max_concurrency)
+
+        # Подписываемся до первого сканирования, чтобы не пропустить файлы, появившиеся между ними
+        events = self.watcher.add_watch(sensor_dir) if self.watcher else None
+        loop = asyncio.get_running_loop()
+        sensor = os.path.basename(sensor_dir)
+
+        queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        room = asyncio.Event()
+        backlog = []  # Куча (приоритет, имя файла) найденных файлов, еще не попавших в очередь
+        seen = dict()  # Имя файла -> подпись, с которой он передан на обработку в этом запуске
+
+        consumers = [asyncio.create_task(self.consume(sensor_dir, queue, room, seen, processed_files, manifest))
+                     for _ in range(self.workers_per_sensor)]
+
+        def add(filename, entry_stat=None):
+            if not filename.lower().endswith('.csv'):
+                return
+            try:
+                entry_stat = entry_stat or os.stat(os.path.join(sensor_dir, filename))
+            except FileNotFoundError:
+                return
+            signature = ProcessedManifest.signature(entry_stat)
+            if seen.get(filename) == signature:  # Файл не менялся с тех пор, как передан на обработку
+                return
+            seen[filename] = signature
+            heapq.heappush(backlog, self.queue_key(entry_stat, filename))
+
+        waiters = []
+        try:
+            next_scan = loop.time()
+            while True:
+                if loop.time() >= next_scan:
+                    names = set()
+                    with os.scandir(sensor_dir) as entries:
+                        for entry in entries:
+                            names.add(entry.name)
+                            if entry.name.lower().endswith('.csv'):
+                                add(entry.name, entry.stat())
+                    # Удаленные файлы (например, сборщиком мусора) больше не храним
+                    for filename in [filename for filename in seen if filename not in names]:
+                        del seen[filename]
+                        processed_files.pop(filename, None)
+                    await manifest.prune(names)
+                    next_scan = loop.time() + (self.poll_interval if events is None else self.reconcile_interval)
+
+                while backlog and not queue.full():
+                    queue.put_nowait(heapq.heappop(backlog))
+                metrics.set_gauge('queue_depth', len(backlog) + queue.qsize(), sensor)
+
+                # Ждем новый файл, свободное место в очереди или время следующей сверки
+                room.clear()
+                waiters = [asyncio.ensure_future(room.wait())] if backlog else []
+                if events is not None:
+                    waiters.append(asyncio.ensure_future(events.get()))
+                timeout = max(next_scan - loop.time(), 0)
+                if not waiters:
+                    await asyncio.sleep(timeout)
+                    continue
+
+                done, pending = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in pending:
+                    waiter.cancel()
+                for waiter in done:
+                    filename = waiter.result()
+                    if filename is None:  # События потеряны - сразу делаем полную сверку
+                        next_scan = loop.time()
+                    elif isinstance(filename, str):
+                        add(filename)
+        finally:
+            for task in consumers + waiters:
+                task.cancel()
+            # Обработчики должны завершиться до закрытия писателей в get_dirs
+            await asyncio.gather(*consumers, *waiters, return_exceptions=True)
+
+    def create_watcher(self):
+        """
+        Создание наблюдателя за папками в соответствии с watch_mode
+        :return: InotifyWatcher или None для режима опроса
+        """
+        if self.watch_mode == 'poll':
+            return None
+        if self.watch_mode == 'auto' and not InotifyWatcher.is_supported():
+            return None
+        try:
+            return InotifyWatcher()
+        except OSError as e:
+            if self.watch_mode == 'inotify':
+                raise
+            print(f'Error: inotify is unavailable ({e}), falling back to polling')
+            return None
+
+    async def flush(self):
+        """
+        Запись накопленных данных: пакета в базу (в режиме sqlite) и строк минимумов всех датчиков
+        """
+        if self.database:
+            await self.database.flush()
+        await asyncio.gather(*[writer.flush() for writer in self.writers.values()])
+
+    async def flush_periodically(self):
+        """
+        Запись накопленных данных не реже раза в flush_interval
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        """
+        Запись оставшихся данных и закрытие файлов и базы
+        """
+        if self.database:
+            await self.database.close()
+        await asyncio.gather(*[writer.close() for writer in self.writers.values()])
+        self.writers.clear()
+        if self.write_executor:
+            self.write_executor.shutdown()
+            self.write_executor = None
+
+    def start_executor(self):
+        """
+        Создание пула процессов для режима process
+        """
+        if self.ingest_mode == 'process' and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown_executor(self):
+        """
+        Остановка пула процессов
+        """
+        if self.executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def get_dirs(self):
+        """
+        Передача папок в get_files
+        """
+        self.watcher = self.create_watcher()
+        self.ingest_limit = asyncio.Semaphore(self.max_concurrency)
+        self.start_executor()
+        tasks = [self.get_files(os.path.join(self.path_to_dirs, sensor_dir)) for sensor_dir in self.sensor_dirs]
+        try:
+            await asyncio.gather(self.flush_periodically(), *tasks)
+        finally:
+            if self.watcher:
+                self.watcher.close()
+                self.watcher = None
+            self.shutdown_executor()
+            await self.close()
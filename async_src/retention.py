@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import defaultdict
+
+OUTPUT_SUFFIXES = ('_output.txt', '_output.bin')  # Файлы спектров, которые удаляются вместе с CSV
+
+
+class RetentionPolicy:
+    """
+    Правила хранения файлов датчика
+    Файл удаляется, если нарушено хотя бы одно из заданных ограничений; новые файлы сохраняются в первую очередь
+    """
+
+    def __init__(self, max_files=4, max_age=None, max_bytes=None):
+        self.max_files = max_files  # Сколько последних файлов хранить (None - без ограничения)
+        self.max_age = max_age  # Максимальный возраст файла в секундах (None - без ограничения)
+        self.max_bytes = max_bytes  # Максимальный суммарный размер файлов датчика (None - без ограничения)
+
+
+class RetentionIndex:
+    """
+    Индекс обработанных файлов в памяти, по папкам датчиков
+    Заполняется обработчиком файлов, поэтому сборщику мусора не нужно сканировать папки
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()  # Обработчик и сборщик мусора работают в разных потоках
+        self.entries = defaultdict(dict)  # Папка датчика -> имя CSV -> (время изменения, размер в байтах)
+
+    def register(self, sensor_dir, filename, mtime, size):
+        """
+        Добавление обработанного файла в индекс
+        :param sensor_dir: путь к папке датчика
+        :param filename: имя CSV-файла
+        :param mtime: время изменения CSV-файла
+        :param size: размер CSV-файла и его спектра в байтах
+        """
+        with self.lock:
+            self.entries[sensor_dir][filename] = (mtime, size)
+
+    def collect(self, sensor_dir, policy, now=None):
+        """
+        Выбор файлов на удаление по правилам хранения и удаление их из индекса
+        :param sensor_dir: путь к папке датчика
+        :param policy: RetentionPolicy
+        :param now: текущее время (по умолчанию time.time())
+        :return: список имен CSV-файлов на удаление
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            files = self.entries.get(sensor_dir)
+            if not files:
+                return []
+
+            newest_first = sorted(files.items(), key=lambda item: item[1][0], reverse=True)
+            expired = []
+            total_bytes = 0
+            for position, (filename, (mtime, size)) in enumerate(newest_first):
+                total_bytes += size
+                if ((policy.max_files is not None and position >= policy.max_files)
+                        or (policy.max_age is not None and now - mtime > policy.max_age)
+                        or (policy.max_bytes is not None and total_bytes > policy.max_bytes)):
+                    expired.append(filename)
+
+            for filename in expired:
+                del files[filename]
+        return expired
+
+
+def delete_files(sensor_dir, filenames):
+    """
+    Пакетное удаление CSV-файлов и их спектров
+    Отсутствующие файлы пропускаются
+    :param sensor_dir: путь к папке датчика
+    :param filenames: имена CSV-файлов
+    :return: количество удаленных файлов
+    """
+    deleted = 0
+    for filename in filenames:
+        for name in (filename, *(filename + suffix for suffix in OUTPUT_SUFFIXES)):
+            try:
+                os.remove(os.path.join(sensor_dir, name))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+    return deleted
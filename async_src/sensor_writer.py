@@ -0,0 +1,179 @@
+import os
+import json
+import asyncio
+
+FSYNC_POLICIES = ('never', 'batch', 'always')  # Без fsync, fsync после каждой записи пакета, после каждой записи
+MIN_FILE = 'min_values.txt'
+MIN_COLUMNS_FILE = 'min_columns.json'  # Имена столбцов min_values.txt после даты, если пишутся признаки спектра
+
+
+class SensorWriter:
+    """
+    Буферизованная запись результатов одного датчика
+    Файл минимумов держится открытым, строки копятся в памяти и дописываются одним вызовом,
+    когда набирается flush_bytes или по таймеру процессора. Файл спектра записывается целиком одним вызовом.
+    Вся работа с диском выполняется одной передачей в пул потоков на операцию.
+    Файлы отмечаются в манифесте только после записи их минимумов на диск.
+    Если заданы столбцы, их список сохраняется рядом с файлом минимумов в MIN_COLUMNS_FILE
+    (столбцы должны продолжать уже сохраненный список, см. merge_columns)
+    Если задано сегментированное хранилище, минимумы копятся в нем и пишутся тем же пакетом
+    """
+
+    def __init__(self, sensor_dir, executor, flush_bytes=64 * 1024, fsync='never', columns=None, min_store=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'Unknown fsync policy: {fsync}')
+
+        self.sensor_dir = sensor_dir
+        self.executor = executor
+        self.flush_bytes = flush_bytes
+        self.fsync = fsync
+        self.columns = columns  # Имена столбцов строки минимумов после даты (None - только минимум)
+        self.min_store = min_store  # MinSegmentStore при сегментированной истории минимумов
+        self.min_file = None  # Открывается при первой записи
+        self.pending = []  # Строки минимумов, еще не записанные на диск
+        self.pending_bytes = 0
+        self.marks = []  # (манифест, имя файла, os.stat) - отметки, которые вносятся после записи
+        self.lock = asyncio.Lock()
+
+    async def append_min(self, line):
+        """
+        Добавление строки в файл минимумов
+        :param line: строка с переводом строки в конце
+        """
+        data = line.encode()
+        self.pending.append(data)
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= self.flush_bytes or self.fsync == 'always':
+            await self.flush()
+
+    async def append_segment(self, date, value):
+        """
+        Добавление минимума в сегментированное хранилище
+        :param date: время минимума (datetime)
+        :param value: значение минимума
+        """
+        self.pending_bytes += self.min_store.add(date, value)
+        if self.pending_bytes >= self.flush_bytes or self.fsync == 'always':
+            await self.flush()
+
+    def defer_mark(self, manifest, filename, stat):
+        """
+        Отметить файл в манифесте после записи его минимума на диск
+        :param manifest: ProcessedManifest датчика
+        :param filename: имя CSV-файла
+        :param stat: результат os.stat для файла
+        """
+        self.marks.append((manifest, filename, stat))
+
+    async def write_output(self, filename, data):
+        """
+        Запись файла спектра одним вызовом (через временный файл и атомарную замену)
+        :param filename: имя файла в папке датчика
+        :param data: содержимое файла (bytes)
+        """
+        path = os.path.join(self.sensor_dir, filename)
+        await asyncio.get_running_loop().run_in_executor(self.executor, write_file, path, data,
+                                                         self.fsync != 'never')
+
+    def write_min(self, data):
+        """
+        Дописывание пакета строк в открытый файл минимумов (выполняется в пуле потоков)
+        """
+        if self.min_file is None:
+            if self.columns:
+                self.write_columns()
+            self.min_file = open(os.path.join(self.sensor_dir, MIN_FILE), 'ab', buffering=0)
+        self.min_file.write(data)
+        if self.fsync != 'never':
+            os.fsync(self.min_file.fileno())
+
+    def write_columns(self):
+        """
+        Сохранение списка столбцов файла минимумов (выполняется в пуле потоков)
+        Файл заменяется атомарно и только если список изменился
+        """
+        columns = list(self.columns)
+        if read_columns(self.sensor_dir) == columns:
+            return
+        write_file(os.path.join(self.sensor_dir, MIN_COLUMNS_FILE), json.dumps(columns).encode(),
+                   self.fsync != 'never')
+
+    async def flush(self):
+        """
+        Запись накопленных строк минимумов (и сегментов с индексом) и сохранение отложенных отметок манифеста
+        """
+        async with self.lock:
+            pending, self.pending, self.pending_bytes = self.pending, [], 0
+            marks, self.marks = self.marks, []
+            loop = asyncio.get_running_loop()
+            if pending:
+                await loop.run_in_executor(self.executor, self.write_min, b''.join(pending))
+            if self.min_store is not None:
+                segments, index = self.min_store.take_pending()
+                if segments:
+                    await loop.run_in_executor(self.executor, self.min_store.write, segments, index,
+                                               self.fsync != 'never')
+
+            manifests = dict()
+            for manifest, filename, stat in marks:
+                await manifest.mark_processed(filename, stat, save=False)
+                manifests[id(manifest)] = manifest
+            for manifest in manifests.values():
+                await manifest.save()
+
+    async def close(self):
+        """
+        Запись оставшихся данных и закрытие файла минимумов
+        """
+        await self.flush()
+        if self.min_file is not None:
+            self.min_file.close()
+            self.min_file = None
+
+
+def write_file(path, data, sync=False):
+    """
+    Запись файла целиком во временный файл и атомарная замена (выполняется в пуле потоков)
+    Читатель графиков видит либо прежний, либо полностью записанный файл
+    :param path: путь к файлу
+    :param data: содержимое файла (bytes)
+    :param sync: выполнить fsync перед заменой
+    """
+    tmp_path = f'{path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def read_columns(sensor_dir):
+    """
+    Список столбцов файла минимумов датчика
+    :param sensor_dir: путь к папке датчика
+    :return: список имен столбцов после даты (None, если список не сохранен)
+    """
+    try:
+        with open(os.path.join(sensor_dir, MIN_COLUMNS_FILE), 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def merge_columns(saved, columns):
+    """
+    Список столбцов для записи новых строк в файл минимумов
+    Сохраненные столбцы остаются на своих местах, чтобы старые строки читались под прежними именами,
+    новые добавляются в конец. В строке записываются все столбцы, отсутствующие значения - nan
+    :param saved: сохраненный список столбцов (None, если его нет)
+    :param columns: столбцы, которые вычисляются сейчас
+    :return: список столбцов
+    """
+    saved = list(saved or [])
+    return saved + [name for name in columns if name not in saved]
@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SpectrumCache:
+    """
+    LRU-кэш разобранных спектров
+    Запись действительна, пока у файла не изменились время изменения и размер.
+    Объем кэша ограничен суммарным размером массивов в байтах
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # Путь -> (подпись файла, волны, значения, размер в байтах)
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, path, reader):
+        """
+        Получение спектра из кэша или чтение файла
+        :param path: путь к файлу спектра
+        :param reader: функция чтения файла, возвращающая волны и значения
+        :return: массив волн, массив значений (только для чтения)
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        wave, values = reader(path)
+        wave, values = np.array(wave, dtype=np.float64), np.array(values, dtype=np.float64)
+        wave.flags.writeable = False
+        values.flags.writeable = False
+        size = wave.nbytes + values.nbytes
+
+        with self.lock:
+            self.discard(path)
+            if size <= self.max_bytes:
+                self.entries[path] = (signature, wave, values, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, _, _, evicted_size) = self.entries.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+
+        return wave, values
+
+    def discard(self, path):
+        """
+        Удаление записи из кэша (вызывается под self.lock)
+        :param path: путь к файлу спектра
+        """
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+
+    def stats(self):
+        """
+        Счетчики кэша для подбора его размера
+        :return: словарь со счетчиками
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,163 @@
+import io
+import os
+import shutil
+import warnings
+from itertools import islice
+
+import numpy as np
+
+from async_src.features import extract_features
+from async_src.sensor_writer import write_file
+from async_src.spectrum_store import DTYPE, HEADER, MAGIC, VERSION, pack_spectrum
+
+HEADER_ROWS = 14  # Количество строк заголовка в CSV-файле датчика
+CHUNK_ROWS = 65536  # Строк в одном блоке потокового разбора
+
+
+def parse_spectrum(data):
+    """
+    Векторизованный разбор CSV-файла спектра
+    :param data: содержимое файла (bytes)
+    :return: массив длин волн, массив значений (float64)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # Пустой файл обрабатываем сами ниже
+        table = np.loadtxt(io.BytesIO(data), delimiter=',', skiprows=HEADER_ROWS, usecols=(0, 1),
+                           dtype=np.float64, comments=None, ndmin=2)
+
+    if not table.size:
+        raise ValueError('Spectrum file contains no data rows')
+
+    return np.ascontiguousarray(table[:, 0]), np.ascontiguousarray(table[:, 1])
+
+
+def find_min_wave(wave, values):
+    """
+    Длина волны, на которой находится минимум спектра
+    :param wave: массив длин волн
+    :param values: массив значений
+    :return: длина волны минимума
+    """
+    return float(wave[np.argmin(values)])
+
+
+def encode_spectrum(wave, values, output_format='text'):
+    """
+    Содержимое файла спектра
+    :param wave: массив длин волн
+    :param values: массив значений
+    :param output_format: 'text' (строки "длина_волны значение") или 'binary' (см. async_src.spectrum_store)
+    :return: bytes
+    """
+    if output_format == 'binary':
+        return pack_spectrum(wave, values)
+    return ''.join(f'{wave_v} {value_v}\n' for wave_v, value_v in zip(wave.tolist(), values.tolist())).encode()
+
+
+def ingest_spectrum_file(path, output_path, output_format='text', features=(), sync=False):
+    """
+    Обработка файла в одном вызове: чтение, разбор, поиск минимума, признаки, кодирование и запись файла спектра
+    Функция уровня модуля, чтобы ее можно было передать в пул процессов; массивы спектра не возвращаются,
+    чтобы не передавать их обратно между процессами
+    :param path: путь к CSV-файлу
+    :param output_path: путь к файлу спектра (None - не записывать, а вернуть содержимое, например для базы)
+    :param output_format: 'text' или 'binary'
+    :param features: имена признаков (см. async_src.features)
+    :param sync: выполнить fsync файла спектра
+    :return: длина волны минимума, размер CSV-файла в байтах, список признаков,
+             размер записанного файла спектра (или содержимое файла спектра, если output_path не задан)
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    wave, values = parse_spectrum(data)
+    output = encode_spectrum(wave, values, output_format)
+    if output_path is not None:
+        write_file(output_path, output, sync)
+        output = len(output)
+    return find_min_wave(wave, values), len(data), extract_features(wave, values, features), output
+
+
+def iter_spectrum_chunks(file, chunk_rows=CHUNK_ROWS):
+    """
+    Потоковый разбор CSV-файла спектра блоками по chunk_rows строк
+    :param file: файл, открытый в бинарном режиме
+    :param chunk_rows: строк в блоке
+    :return: генератор (массив длин волн, массив значений)
+    """
+    for _ in islice(file, HEADER_ROWS):
+        pass
+
+    while True:
+        lines = list(islice(file, chunk_rows))
+        if not lines:
+            break
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            table = np.loadtxt(lines, delimiter=',', usecols=(0, 1), dtype=np.float64, comments=None, ndmin=2)
+        if table.size:
+            yield table[:, 0], table[:, 1]
+
+
+def stream_spectrum_file(path, output_path, output_format='text', chunk_rows=CHUNK_ROWS, sync=False):
+    """
+    Разбор спектра и запись файла спектра блоками: память не зависит от размера файла
+    Минимум ищется по ходу разбора. В бинарном формате значения копятся во временном файле
+    и дописываются после длин волн, а количество точек в заголовке записывается в конце.
+    Файл спектра пишется во временный файл и заменяется целиком
+    Функция уровня модуля, чтобы ее можно было передать в пул процессов
+    :param path: путь к CSV-файлу
+    :param output_path: путь к файлу спектра
+    :param output_format: 'text' или 'binary'
+    :param chunk_rows: строк в блоке
+    :param sync: выполнить fsync файла спектра
+    :return: длина волны минимума, размер CSV-файла в байтах, размер файла спектра в байтах
+    """
+    tmp_path = f'{output_path}.tmp'
+    values_path = f'{output_path}.values.tmp'
+    best_value, min_wave, count = None, None, 0
+
+    try:
+        with open(path, 'rb') as source, open(tmp_path, 'wb') as output:
+            values_file = open(values_path, 'w+b') if output_format == 'binary' else None
+            try:
+                if values_file is not None:
+                    output.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+
+                for wave, values in iter_spectrum_chunks(source, chunk_rows):
+                    index = int(np.argmin(values))
+                    if best_value is None or values[index] < best_value:
+                        best_value, min_wave = values[index], float(wave[index])
+                    count += len(wave)
+
+                    if values_file is not None:
+                        output.write(wave.astype(DTYPE, copy=False).tobytes())
+                        values_file.write(values.astype(DTYPE, copy=False).tobytes())
+                    else:
+                        output.write(encode_spectrum(wave, values))
+
+                if not count:
+                    raise ValueError('Spectrum file contains no data rows')
+
+                if values_file is not None:
+                    values_file.seek(0)
+                    shutil.copyfileobj(values_file, output)
+                    output.seek(0)
+                    output.write(HEADER.pack(MAGIC, VERSION, 0, count))
+            finally:
+                if values_file is not None:
+                    values_file.close()
+                    os.remove(values_path)
+
+            size = output.seek(0, os.SEEK_END)
+            if sync:
+                output.flush()
+                os.fsync(output.fileno())
+            source_size = os.fstat(source.fileno()).st_size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, output_path)
+    return min_wave, source_size, size
@@ -0,0 +1,128 @@
+import os
+import sys
+import struct
+import argparse
+
+import numpy as np
+
+MAGIC = b'SPEC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')  # Сигнатура, версия, резерв, количество точек
+DTYPE = np.dtype('<f8')  # Little-endian float64
+
+TEXT_SUFFIX = '_output.txt'
+BINARY_SUFFIX = '_output.bin'
+
+
+def pack_spectrum(wave, values):
+    """
+    Упаковка спектра в бинарный формат
+    Формат: заголовок HEADER, затем массив длин волн и массив значений
+    :param wave: массив длин волн
+    :param values: массив значений
+    :return: bytes
+    """
+    wave = np.asarray(wave, dtype=DTYPE)
+    values = np.asarray(values, dtype=DTYPE)
+    if wave.shape != values.shape:
+        raise ValueError('Wave and value arrays must have the same length')
+
+    return HEADER.pack(MAGIC, VERSION, 0, len(wave)) + wave.tobytes() + values.tobytes()
+
+
+def unpack_spectrum(data):
+    """
+    Разбор спектра в бинарном формате из памяти без копирования данных
+    :param data: bytes в формате pack_spectrum
+    :return: массив длин волн, массив значений
+    """
+    magic, version, _, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a packed spectrum')
+
+    array = np.frombuffer(data, dtype=DTYPE, count=2 * count, offset=HEADER.size).reshape(2, count)
+    return array[0], array[1]
+
+
+def read_spectrum(path):
+    """
+    Чтение бинарного файла спектра через memmap без копирования данных
+    :param path: путь к файлу _output.bin
+    :return: массив длин волн, массив значений
+    """
+    with open(path, 'rb') as file:
+        magic, version, _, count = HEADER.unpack(file.read(HEADER.size))
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'Not a spectrum file: {path}')
+    if count == 0:
+        return np.empty(0, dtype=DTYPE), np.empty(0, dtype=DTYPE)
+
+    data = np.memmap(path, dtype=DTYPE, mode='r', offset=HEADER.size, shape=(2, count))
+    return data[0], data[1]
+
+
+def read_text_spectrum(path):
+    """
+    Чтение текстового файла спектра (_output.txt)
+    :param path: путь к файлу
+    :return: список волн, список значений
+    """
+    with open(path) as file:
+        lines = file.readlines()
+        waves = [float(line.split()[0]) for line in lines]
+        values = [float(line.split()[1]) for line in lines]
+    return waves, values
+
+
+def convert_text_output(path, keep_text=False):
+    """
+    Конвертация текстового файла спектра в бинарный
+    :param path: путь к файлу _output.txt
+    :param keep_text: не удалять исходный текстовый файл
+    :return: путь к бинарному файлу
+    """
+    waves, values = read_text_spectrum(path)
+    binary_path = path[:-len(TEXT_SUFFIX)] + BINARY_SUFFIX
+
+    tmp_path = f'{binary_path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(pack_spectrum(waves, values))
+    os.replace(tmp_path, binary_path)
+
+    if not keep_text:
+        os.remove(path)
+    return binary_path
+
+
+def convert_directory(path, keep_text=False):
+    """
+    Конвертация всех файлов _output.txt в папке и ее подпапках
+    :param path: общая директория или папка датчика
+    :param keep_text: не удалять исходные текстовые файлы
+    :return: количество сконвертированных файлов
+    """
+    converted = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            if filename.endswith(TEXT_SUFFIX):
+                convert_text_output(os.path.join(root, filename), keep_text)
+                converted += 1
+    return converted
+
+
+def main(argv=None):
+    """
+    Конвертер старых файлов: python -m async_src.spectrum_store PATH [PATH ...]
+    """
+    parser = argparse.ArgumentParser(description='Convert _output.txt spectrum files to the binary format')
+    parser.add_argument('paths', nargs='+', help='sensor directories or the common directory')
+    parser.add_argument('--keep-text', action='store_true', help='keep the original _output.txt files')
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        print(f'{path}: {convert_directory(path, args.keep_text)} files converted')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
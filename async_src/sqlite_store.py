@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from async_src.spectrum_store import unpack_spectrum
+
+DB_FILE = 'sensor_data.sqlite'  # База данных в общей директории датчиков
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS minimums (
+    sensor TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS minimums_sensor_timestamp ON minimums (sensor, timestamp);
+CREATE TABLE IF NOT EXISTS spectra (
+    sensor TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (sensor, filename)
+);
+CREATE INDEX IF NOT EXISTS spectra_sensor_timestamp ON spectra (sensor, timestamp);
+"""
+
+
+def connect(path, readonly=False):
+    """
+    Подключение к базе данных
+    Запись открывает базу в режиме WAL, поэтому читатели не блокируют запись и наоборот
+    :param path: путь к файлу базы
+    :param readonly: подключение только для чтения
+    :return: sqlite3.Connection
+    """
+    if readonly:
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, timeout=30, check_same_thread=False)
+
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class SQLiteWriter:
+    """
+    Пакетная запись минимумов и спектров в базу
+    Строки копятся в памяти и записываются одной транзакцией, когда набирается batch_size
+    или по таймеру процессора. Подключение используется только в отдельном потоке записи.
+    Манифесты сохраняются после фиксации транзакции, поэтому файл не считается обработанным раньше,
+    чем его данные попали в базу
+    """
+
+    def __init__(self, path, batch_size=100):
+        self.path = path
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.connection = None
+        self.minimums = []  # (датчик, метка времени, значение)
+        self.spectra = []  # (датчик, имя файла, метка времени, упакованный спектр)
+        self.marks = []  # (манифест, имя файла, os.stat) - отметки, которые вносятся после записи
+        self.flush_lock = asyncio.Lock()  # Пакеты и манифесты записываются по очереди
+
+    async def add(self, sensor, date, value, filename, data):
+        """
+        Добавление результата обработки файла в пакет
+        :param sensor: имя датчика
+        :param date: время минимума (datetime)
+        :param value: значение минимума
+        :param filename: имя CSV-файла
+        :param data: спектр в формате pack_spectrum
+        """
+        timestamp = date.timestamp()
+        self.minimums.append((sensor, timestamp, float(value)))
+        self.spectra.append((sensor, filename, timestamp, data))
+        if len(self.minimums) >= self.batch_size:
+            await self.flush()
+
+    def defer_mark(self, manifest, filename, stat):
+        """
+        Отметить файл в манифесте после записи его данных в базу
+        :param manifest: ProcessedManifest датчика
+        :param filename: имя CSV-файла
+        :param stat: результат os.stat для файла
+        """
+        self.marks.append((manifest, filename, stat))
+
+    def write_batch(self, minimums, spectra):
+        """
+        Запись пакета одной транзакцией (выполняется в потоке записи)
+        """
+        if self.connection is None:
+            self.connection = connect(self.path)
+        with self.connection:
+            self.connection.executemany('INSERT INTO minimums VALUES (?, ?, ?)', minimums)
+            self.connection.executemany('INSERT OR REPLACE INTO spectra VALUES (?, ?, ?, ?)', spectra)
+
+    async def flush(self):
+        """
+        Запись накопленного пакета и сохранение отложенных манифестов
+        """
+        async with self.flush_lock:
+            minimums, self.minimums = self.minimums, []
+            spectra, self.spectra = self.spectra, []
+            marks, self.marks = self.marks, []
+            if minimums or spectra:
+                await asyncio.get_running_loop().run_in_executor(self.executor, self.write_batch, minimums, spectra)
+
+            manifests = dict()
+            for manifest, filename, stat in marks:
+                await manifest.mark_processed(filename, stat, save=False)
+                manifests[id(manifest)] = manifest
+            for manifest in manifests.values():
+                await manifest.save()
+
+    async def close(self):
+        """
+        Запись оставшихся данных и закрытие подключения
+        """
+        await self.flush()
+        if self.connection is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.connection.close)
+            self.connection = None
+        self.executor.shutdown()
+
+
+class SQLiteReader:
+    """
+    Чтение минимумов и спектров из базы
+    У каждого потока свое подключение только для чтения
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        """
+        Подключение текущего потока (None, если базы еще нет)
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None and os.path.exists(self.path):
+            connection = connect(self.path, readonly=True)
+            self.local.connection = connection
+        return connection
+
+    def query(self, sql, parameters):
+        """
+        Выполнение запроса
+        :return: список строк (пустой, если базы еще нет)
+        """
+        connection = self.connection()
+        if connection is None:
+            return []
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'no such table' in str(e):  # База создана, но схема еще не записана
+                return []
+            raise
+
+    def read_minimums(self, sensor, start=None, end=None):
+        """
+        Минимумы датчика за диапазон времени (по индексу (sensor, timestamp))
+        :param sensor: имя датчика
+        :param start: начало диапазона (datetime или None)
+        :param end: конец диапазона (datetime или None)
+        :return: список дат, список значений минимумов, список меток времени (секунды)
+        """
+        rows = self.query('SELECT timestamp, value FROM minimums WHERE sensor = ? AND timestamp BETWEEN ? AND ? '
+                          'ORDER BY timestamp',
+                          (sensor, start.timestamp() if start else float('-inf'),
+                           end.timestamp() if end else float('inf')))
+        times = [row[0] for row in rows]
+        return [datetime.fromtimestamp(timestamp) for timestamp in times], [row[1] for row in rows], times
+
+    def spectra_signature(self, sensor):
+        """
+        Подпись спектров датчика для проверки, изменились ли данные
+        :return: кортеж (имя файла, метка времени)
+        """
+        return tuple(self.query('SELECT filename, timestamp FROM spectra WHERE sensor = ? ORDER BY filename',
+                                (sensor,)))
+
+    def read_spectra(self, sensor):
+        """
+        Спектры датчика в порядке времени
+        :param sensor: имя датчика
+        :return: генератор (массив длин волн, массив значений)
+        """
+        for (data,) in self.query('SELECT data FROM spectra WHERE sensor = ? ORDER BY timestamp', (sensor,)):
+            yield unpack_spectrum(data)
+
+
+def delete_spectra(path, sensor, filenames):
+    """
+    Удаление спектров файлов из базы (для сборщика мусора)
+    :param path: путь к файлу базы
+    :param sensor: имя датчика
+    :param filenames: имена CSV-файлов
+    :return: количество удаленных спектров
+    """
+    if not os.path.exists(path):
+        return 0
+    connection = connect(path)
+    try:
+        with connection:
+            cursor = connection.executemany('DELETE FROM spectra WHERE sensor = ? AND filename = ?',
+                                            [(sensor, filename) for filename in filenames])
+        return cursor.rowcount
+    finally:
+        connection.close()
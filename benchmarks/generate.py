@@ -0,0 +1,83 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from async_src.spectrum_parser import HEADER_ROWS
+
+
+def write_csv(path, rows, rng):
+    """
+    Запись синтетического CSV-файла датчика: заголовок из HEADER_ROWS строк и спектр с провалом
+    :param path: путь к файлу
+    :param rows: количество строк спектра
+    :param rng: генератор случайных чисел numpy
+    """
+    wave = np.linspace(1500.0, 1600.0, rows)
+    center = rng.uniform(1520.0, 1580.0)
+    values = -10 - 30 * np.exp(-((wave - center) / 0.5) ** 2) + rng.normal(0, 0.05, rows)
+
+    with open(path, 'w') as file:
+        file.write('Instrument,Synthetic sensor\n')
+        for i in range(1, HEADER_ROWS):
+            file.write(f'Header {i},value {i}\n')
+        file.write(''.join(f'{w:.4f},{v:.5f}\n' for w, v in zip(wave.tolist(), values.tolist())))
+
+
+def write_min_history(path, lines, rng):
+    """
+    Запись истории минимумов в формате min_values.txt
+    :param path: путь к файлу
+    :param lines: количество строк
+    :param rng: генератор случайных чисел numpy
+    """
+    start = datetime(2024, 1, 1)
+    minimums = rng.uniform(1520.0, 1580.0, lines)
+    with open(path, 'w') as file:
+        file.write(''.join(f"{(start + timedelta(seconds=5 * i)).strftime('%Y-%m-%d;%H:%M:%S')} {value}\n"
+                           for i, value in enumerate(minimums.tolist())))
+
+
+def generate_tree(root, sensors=4, files=10, rows=2000, history=0, seed=0):
+    """
+    Создание дерева датчиков для бенчмарков
+    :param root: общая директория
+    :param sensors: количество папок датчиков
+    :param files: количество CSV-файлов в каждой папке
+    :param rows: количество строк спектра в каждом файле
+    :param history: количество строк в min_values.txt каждого датчика (0 - файл не создается)
+    :param seed: начальное значение генератора
+    :return: список имен папок датчиков
+    """
+    rng = np.random.default_rng(seed)
+    sensor_dirs = [f'sensor{i + 1}' for i in range(sensors)]
+    for sensor_dir in sensor_dirs:
+        path = os.path.join(root, sensor_dir)
+        os.makedirs(path, exist_ok=True)
+        for i in range(files):
+            write_csv(os.path.join(path, f'spectrum_{i:05d}.csv'), rows, rng)
+        if history:
+            write_min_history(os.path.join(path, 'min_values.txt'), history, rng)
+    return sensor_dirs
+
+
+def main(argv=None):
+    """
+    Генератор: python -m benchmarks.generate PATH [опции]
+    """
+    parser = argparse.ArgumentParser(description='Generate a synthetic sensor directory tree')
+    parser.add_argument('path', help='directory to create the sensor folders in')
+    parser.add_argument('--sensors', type=int, default=4)
+    parser.add_argument('--files', type=int, default=10, help='CSV files per sensor')
+    parser.add_argument('--rows', type=int, default=2000, help='spectrum rows per CSV file')
+    parser.add_argument('--history', type=int, default=0, help='lines in each min_values.txt')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate_tree(args.path, args.sensors, args.files, args.rows, args.history, args.seed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from async_src.graph_master import GraphMaster
+from async_src.processing import FileProcessor, PARSE_ENGINES
+from async_src.spectrum_cache import SpectrumCache
+from benchmarks.generate import generate_tree
+
+
+def summarize(samples):
+    """
+    Сводка по замерам
+    :param samples: длительности в секундах
+    :return: словарь со статистикой
+    """
+    return {
+        'repeats': len(samples),
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+        'unit': 's',
+    }
+
+
+def measure(func, repeats, setup=None):
+    """
+    Замер времени выполнения функции
+    :param func: функция, принимающая результат setup
+    :param repeats: количество повторов
+    :param setup: подготовка перед каждым повтором (не входит в замер)
+    :return: словарь со статистикой
+    """
+    samples = []
+    for _ in range(repeats):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_process_file(root, sensor_dirs, repeats):
+    """
+    FileProcessor.process_file (общий код FileProcessorThread) для каждого движка разбора и для режима process
+    Все файлы обрабатываются в одном цикле событий, как в FileProcessorThread; в конце процессор закрывается,
+    чтобы записать накопленные строки минимумов и остановить пулы
+    """
+    sensor_path = os.path.join(root, sensor_dirs[0])
+    filenames = sorted(name for name in os.listdir(sensor_path) if name.endswith('.csv'))
+    variants = {engine: {'parse_engine': engine} for engine in PARSE_ENGINES}
+    variants['process'] = {'ingest_mode': 'process'}
+
+    async def run(processor):
+        samples = []
+        processor.start_executor()
+        try:
+            for _ in range(repeats):
+                for filename in filenames:
+                    start = time.perf_counter()
+                    await processor.process_file(sensor_path, filename)
+                    samples.append(time.perf_counter() - start)
+        finally:
+            await processor.close()
+            processor.shutdown_executor()
+        return samples
+
+    results = {}
+    for name, options in variants.items():
+        samples = asyncio.run(run(FileProcessor(root, sensor_dirs, **options)))
+        results[f'process_file[{name}]'] = summarize(samples)
+    return results
+
+
+def bench_graph_master(root, sensor_dirs, repeats):
+    """
+    GraphMaster.get_min_files и get_wave_files: холодное чтение и повторное без изменений
+    """
+    sensor_dir = sensor_dirs[0]
+    warm = GraphMaster(root, sensor_dirs)
+    warm.get_min_files(sensor_dir)
+    list(warm.get_wave_files(sensor_dir))
+
+    return {
+        'get_min_files[cold]': measure(lambda master: master.get_min_files(sensor_dir), repeats,
+                                       lambda: GraphMaster(root, sensor_dirs)),
+        'get_min_files[warm]': measure(lambda _: warm.get_min_files(sensor_dir), repeats),
+        'get_wave_files[cold]': measure(lambda master: list(master.get_wave_files(sensor_dir)), repeats,
+                                        lambda: GraphMaster(root, sensor_dirs, spectrum_cache=SpectrumCache())),
+        'get_wave_files[warm]': measure(lambda _: list(warm.get_wave_files(sensor_dir)), repeats),
+    }
+
+
+def bench_garbage_collector(root, sensor_dirs, repeats):
+    """
+    Проход GarbageCollectorThread.collect_old_files по копии папки датчика
+    Индекс хранения заполняется при подготовке, как это делает обработчик файлов
+    """
+    from async_src.garbage_collector import GarbageCollectorThread
+    from async_src.retention import RetentionIndex
+
+    source = os.path.join(root, sensor_dirs[0])
+    target = os.path.join(root, 'gc_copy')
+    retention_index = RetentionIndex()
+    collector = GarbageCollectorThread(root, ['gc_copy'], retention_index)
+
+    def setup():
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target)
+        with os.scandir(target) as entries:
+            for entry in entries:
+                if entry.name.endswith('.csv'):
+                    stat = entry.stat()
+                    retention_index.register(target, entry.name, stat.st_mtime, stat.st_size)
+        return target
+
+    result = measure(lambda path: asyncio.run(collector.collect_old_files(path)), repeats, setup)
+    shutil.rmtree(target, ignore_errors=True)
+    return {'collect_old_files': result}
+
+
+def bench_render(root, sensor_dirs, repeats):
+    """
+    SensorMonitor.update_graphs без дисплея (QT_QPA_PLATFORM=offscreen)
+    Датчики чередуются, чтобы данные менялись при каждом обновлении
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    from async_src.draw_master import SensorMonitor, RENDER_MODES
+
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    for render_mode in RENDER_MODES:
+        window = SensorMonitor(render_mode=render_mode, background_loading=False)
+        window.graph_master = GraphMaster(root, sensor_dirs)
+        calls = iter(range(1, repeats + 1))
+
+        def update(_):
+            window.update_graphs(sensor_dirs[next(calls) % len(sensor_dirs)], 0)
+            app.processEvents()  # Выполняем отложенную отрисовку draw_idle
+
+        for sensor_dir in sensor_dirs:  # Первое построение графиков и чтение файлов не учитываем
+            window.update_graphs(sensor_dir, 0)
+        app.processEvents()
+        results[f'update_graphs[{render_mode}]'] = measure(update, repeats)
+        window.close()
+    return results
+
+
+def main(argv=None):
+    """
+    Бенчмарки: python -m benchmarks.run [опции] > results.json
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the ingest and render hot paths')
+    parser.add_argument('--sensors', type=int, default=4)
+    parser.add_argument('--files', type=int, default=10, help='CSV files per sensor')
+    parser.add_argument('--rows', type=int, default=2000, help='spectrum rows per CSV file')
+    parser.add_argument('--history', type=int, default=100000, help='lines in each min_values.txt')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--workdir', help='directory for the synthetic tree (temporary by default)')
+    parser.add_argument('--skip-render', action='store_true', help='do not benchmark the Qt/matplotlib render')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    root = args.workdir or tempfile.mkdtemp(prefix='sensor_bench_')
+    try:
+        sensor_dirs = generate_tree(root, args.sensors, args.files, args.rows, args.history)
+
+        results = {}
+        results.update(bench_process_file(root, sensor_dirs, args.repeats))
+        results.update(bench_graph_master(root, sensor_dirs, args.repeats))
+        results.update(bench_garbage_collector(root, sensor_dirs, args.repeats))
+        if not args.skip_render:
+            results.update(bench_render(root, sensor_dirs, args.repeats))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'params': {key: value for key, value in vars(args).items() if key not in ('workdir', 'output')},
+        },
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
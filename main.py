@@ -1,5 +1,6 @@
 import asyncio
 import sys
+from multiprocessing import freeze_support
 from PyQt5.QtWidgets import QApplication
 from async_src.draw_master import SensorMonitor
 
@@ -12,4 +13,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    freeze_support()  # Нужно для пула процессов в собранном PyInstaller приложении
     asyncio.run(main())
@@ -0,0 +1,22 @@
+import asyncio
+import os
+from datetime import datetime
+
+from async_src.batch_ingest import BatchIngest
+
+CSV = 'header\n' * 14 + ''.join(f'{1500 + i},{abs(i - 5)}\n' for i in range(10))
+
+
+def test_rows_are_stamped_with_file_mtime(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    stamps = [datetime(2026, 3, day, 10, 30) for day in (1, 2, 3)]
+    for i, stamp in enumerate(stamps):
+        path = sensor_dir / f'{i}.csv'
+        path.write_text(CSV)
+        os.utime(path, (stamp.timestamp(), stamp.timestamp()))
+
+    asyncio.run(BatchIngest(str(tmp_path), progress_interval=60).run())
+
+    lines = (sensor_dir / 'min_values.txt').read_text().splitlines()
+    assert [line.split()[0] for line in lines] == [stamp.strftime('%Y-%m-%d;%H:%M:%S') for stamp in stamps]
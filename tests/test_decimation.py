@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from async_src.decimation import decimate, lttb_indices, minmax_indices
+
+
+def signal(length=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(length, dtype=np.float64)
+    return x, np.cumsum(rng.normal(size=length))
+
+
+def test_short_input_is_kept():
+    x, y = signal(150)
+    assert np.array_equal(decimate(x, y, 100), np.arange(150))
+    assert len(decimate([], [], 100)) == 0
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        decimate([1.0], [1.0], 10, 'average')
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_keeps_endpoints_and_bounds_size(method):
+    x, y = signal()
+    indices = decimate(x, y, 100, method)
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= 2 * 100 + 2
+
+
+def test_minmax_keeps_extremes():
+    x, y = signal()
+    indices = minmax_indices(x, y, 100)
+    assert np.argmin(y) in indices and np.argmax(y) in indices
+
+    # В каждой корзине остаются ее минимум и максимум
+    bucket = np.minimum((x / x[-1] * 100).astype(int), 99)
+    for b in (0, 37, 99):
+        members = np.flatnonzero(bucket == b)
+        assert members[np.argmin(y[members])] in indices
+        assert members[np.argmax(y[members])] in indices
+
+
+def test_minmax_unsorted_x():
+    x, y = signal(1000)
+    order = np.random.default_rng(1).permutation(len(x))
+    indices = minmax_indices(x[order], y[order], 20)
+    assert np.all(np.diff(indices) > 0)
+    assert set(order[indices]) >= {int(np.argmin(y)), int(np.argmax(y))}
+
+
+def test_minmax_zero_span():
+    x = np.zeros(1000)
+    y = np.arange(1000, dtype=np.float64)
+    assert list(minmax_indices(x, y, 10)) == [0, 999]
+
+
+def test_minmax_all_nan():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.full(1000, np.nan)
+    assert list(decimate(x, y, 10)) == [0, 999]
+
+
+def test_lttb_threshold():
+    x, y = signal(1000)
+    assert len(lttb_indices(x, y, 50)) == 50
+    assert np.array_equal(lttb_indices(x, y, 2000), np.arange(1000))
+    assert np.array_equal(lttb_indices(x, y, 2), np.arange(1000))
+
+
+def test_lttb_keeps_spike():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    assert 500 in lttb_indices(x, y, 20)
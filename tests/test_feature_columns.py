@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import numpy as np
+
+from async_src.graph_master import GraphMaster
+from async_src.processing import FileProcessor
+from async_src.sensor_writer import MIN_COLUMNS_FILE, merge_columns
+
+
+def write_csv(path, center):
+    wave = np.linspace(1500, 1600, 501)
+    values = 1 - 0.5 * np.exp(-((wave - center) / 2) ** 2)
+    with open(path, 'w') as file:
+        file.write('header\n' * 14)
+        file.writelines(f'{w},{v}\n' for w, v in zip(wave, values))
+
+
+def ingest(tmp_path, filename, features):
+    processor = FileProcessor(str(tmp_path), ['sensor1'], features=features)
+
+    async def run():
+        await processor.process_file(str(tmp_path / 'sensor1'), filename)
+        await processor.close()
+
+    asyncio.run(run())
+
+
+def test_merge_columns_keeps_saved_order():
+    assert merge_columns(None, ['min_wave', 'depth']) == ['min_wave', 'depth']
+    assert merge_columns(['min_wave', 'fit', 'fwhm', 'depth'], ['min_wave', 'depth', 'fwhm']) == \
+        ['min_wave', 'fit', 'fwhm', 'depth']
+    assert merge_columns(['min_wave', 'depth'], ['min_wave', 'mean', 'depth']) == ['min_wave', 'depth', 'mean']
+
+
+def test_changed_feature_list_keeps_history(tmp_path):
+    (tmp_path / 'sensor1').mkdir()
+    write_csv(tmp_path / 'sensor1' / 'a.csv', 1530)
+    write_csv(tmp_path / 'sensor1' / 'b.csv', 1560)
+
+    ingest(tmp_path, 'a.csv', ('min_wave_fit', 'fwhm', 'depth'))
+    ingest(tmp_path, 'b.csv', ('depth', 'fwhm', 'mean'))
+
+    columns = json.loads((tmp_path / 'sensor1' / MIN_COLUMNS_FILE).read_text())
+    assert columns == ['min_wave', 'min_wave_fit', 'fwhm', 'depth', 'mean']
+
+    graph_master = GraphMaster(str(tmp_path), ['sensor1'])
+    depth = graph_master.get_min_data('sensor1', feature='depth')[1]
+    assert np.allclose(depth, 0.5, atol=0.01)
+    fit = graph_master.get_min_data('sensor1', feature='min_wave_fit')[1]
+    assert abs(fit[0] - 1530) < 0.01 and np.isnan(fit[1])
+    mean = graph_master.get_min_data('sensor1', feature='mean')[1]
+    assert np.isnan(mean[0]) and not np.isnan(mean[1])
+
+
+def test_view_skips_rows_without_feature(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    (sensor_dir / MIN_COLUMNS_FILE).write_text(json.dumps(['min_wave', 'depth', 'mean']))
+    with open(sensor_dir / 'min_values.txt', 'w') as file:
+        for i in range(1000):
+            # Старые строки без признаков, затем строки с depth и без mean
+            extra = '' if i < 500 else f' {i % 7} nan'
+            file.write(f'2026-01-01;{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d} {1500 + i}{extra}\n')
+
+    graph_master = GraphMaster(str(tmp_path), ['sensor1'])
+    dates, depth, count = graph_master.get_min_view('sensor1', 20, feature='depth')
+    assert count == 1000 and 0 < len(depth) <= 42
+    assert not np.isnan(depth).any()
+    assert min(depth) == 0.0 and max(depth) == 6.0
+
+    assert graph_master.get_min_view('sensor1', 20, feature='mean')[1] == []
+    assert len(graph_master.get_min_view('sensor1', 20)[1]) > 2
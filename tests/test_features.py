@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from async_src.features import FEATURES, extract_features, feature, validate_features
+
+WAVE = np.linspace(1500, 1600, 2001)
+
+
+def dip(center=1550.013, sigma=2.0, depth=0.8):
+    return 1 - depth * np.exp(-((WAVE - center) / sigma) ** 2)
+
+
+def test_gaussian_dip():
+    min_wave_fit, depth, fwhm, mean = extract_features(WAVE, dip(), ['min_wave_fit', 'depth', 'fwhm', 'mean'])
+    assert min_wave_fit == pytest.approx(1550.013, abs=1e-3)  # Точнее шага сетки 0.05
+    assert depth == pytest.approx(0.8, abs=1e-3)
+    assert fwhm == pytest.approx(2 * 2.0 * math.sqrt(math.log(2)), rel=1e-3)
+    assert mean == pytest.approx(dip().mean())
+
+
+def test_minimum_at_edge():
+    values = np.linspace(0, 1, len(WAVE))
+    min_wave_fit, fwhm = extract_features(WAVE, values, ['min_wave_fit', 'fwhm'])
+    assert min_wave_fit == WAVE[0]
+    assert math.isnan(fwhm)
+
+
+def test_no_half_depth_crossing_on_one_side():
+    # Провал обрезан справа: значения не поднимаются до половины глубины
+    values = dip(center=1599)
+    assert math.isnan(extract_features(WAVE, values, ['fwhm'])[0])
+
+
+def test_flat_spectrum():
+    values = np.ones(len(WAVE))
+    min_wave_fit, depth, fwhm = extract_features(WAVE, values, ['min_wave_fit', 'depth', 'fwhm'])
+    assert min_wave_fit == WAVE[0] and depth == 0.0 and math.isnan(fwhm)
+
+
+def test_nonuniform_parabola_fit():
+    wave = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    values = (wave - 2.25) ** 2
+    assert extract_features(wave, values, ['min_wave_fit'])[0] == pytest.approx(2.25)
+
+
+def test_order_and_shared_context():
+    calls = []
+
+    @feature('test_probe')
+    def probe(wave, values, context):
+        calls.append(dict(context))
+        return 1.0
+
+    try:
+        values = dip()
+        result = extract_features(WAVE, values, ['depth', 'test_probe', 'mean'])
+        assert result[1] == 1.0 and result[2] == pytest.approx(values.mean())
+        # Промежуточные результаты предыдущих признаков доступны следующим
+        assert set(calls[0]) == {'index', 'baseline'}
+    finally:
+        del FEATURES['test_probe']
+
+
+def test_validate_features():
+    validate_features(['depth', 'fwhm'])
+    with pytest.raises(ValueError, match='bogus'):
+        validate_features(['depth', 'bogus'])
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from async_src.graph_loader import GraphLoaderThread
+
+
+class FakeGraphMaster:
+    """
+    Загрузка датчика 'slow' ждет события release, остальные выполняются сразу
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.loaded = []
+        self.lock = threading.Lock()
+
+    def get_graph_data(self, sensor, *args):
+        if sensor == 'slow':
+            self.release.wait(5)
+        with self.lock:
+            self.loaded.append(sensor)
+        return {'sensor': sensor}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def loader():
+    graph_master = FakeGraphMaster()
+    thread = GraphLoaderThread(graph_master)
+    thread.start()
+    assert wait_for(lambda: thread.loop is not None)
+    yield thread
+    graph_master.release.set()
+    thread.stop()
+    thread.wait()
+
+
+def test_slow_monitor_does_not_block_others(loader):
+    graph_master = loader.graph_master
+    loader.request(0, 'slow')
+    assert wait_for(lambda: 0 in loader.in_flight)
+
+    loader.request(1, 'fast')
+    assert wait_for(lambda: 'fast' in graph_master.loaded)
+
+    # Новый запрос, пришедший после первого пакета, тоже не ждет медленный монитор
+    loader.request(2, 'fast2')
+    assert wait_for(lambda: 'fast2' in graph_master.loaded)
+    assert 'slow' not in graph_master.loaded
+
+    graph_master.release.set()
+    assert wait_for(lambda: 'slow' in graph_master.loaded)
+
+
+def test_monitor_request_waits_for_its_own_load(loader):
+    graph_master = loader.graph_master
+    loader.request(0, 'slow')
+    assert wait_for(lambda: 0 in loader.in_flight)
+
+    assert loader.request(0, 'slow') is None  # Тот же датчик уже загружается
+    assert loader.request(0, 'other') is not None
+    time.sleep(0.1)
+    assert 'other' not in graph_master.loaded and 0 in loader.pending
+
+    graph_master.release.set()
+    assert wait_for(lambda: graph_master.loaded == ['slow', 'other'])
+
+
+def test_stop_before_loop_starts():
+    thread = GraphLoaderThread(FakeGraphMaster())
+    thread.start()
+    thread.stop()  # Цикл загрузчика еще может быть не создан
+    assert thread.wait(3000)
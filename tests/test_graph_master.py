@@ -0,0 +1,94 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from async_src.graph_master import GraphMaster
+from async_src.spectrum_store import pack_spectrum
+
+START = datetime(2026, 1, 1)
+
+
+def write_lines(path, first, count, mode='a'):
+    """
+    Запись строк min_values.txt с шагом в минуту, значение - номер строки
+    """
+    with open(path, mode) as file:
+        for i in range(first, first + count):
+            file.write(f"{(START + timedelta(minutes=i)).strftime('%Y-%m-%d;%H:%M:%S')} {float(i)}\n")
+
+
+def make_sensor(tmp_path, count):
+    os.makedirs(tmp_path / 'sensor1')
+    path = tmp_path / 'sensor1' / 'min_values.txt'
+    write_lines(path, 0, count, 'w')
+    return GraphMaster(str(tmp_path), ['sensor1']), path
+
+
+def test_range_after_append(tmp_path):
+    graph_master, path = make_sensor(tmp_path, 10)
+    start, end = START + timedelta(minutes=2), START + timedelta(minutes=12)
+
+    assert graph_master.get_min_data('sensor1', start, end)[1] == [float(i) for i in range(2, 10)]
+
+    write_lines(path, 10, 5)
+    dates, values = graph_master.get_min_data('sensor1', start, end)
+    assert values == [float(i) for i in range(2, 13)]
+    assert dates[-1] == end
+
+
+def test_partial_line_is_read_later(tmp_path):
+    graph_master, path = make_sensor(tmp_path, 3)
+    with open(path, 'a') as file:
+        file.write('2026-01-01;00:03:00 3.')
+
+    assert graph_master.get_min_data('sensor1')[1] == [0.0, 1.0, 2.0]
+
+    with open(path, 'a') as file:
+        file.write('0\n')
+    assert graph_master.get_min_data('sensor1')[1] == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_truncated_file_is_reread(tmp_path):
+    graph_master, path = make_sensor(tmp_path, 10)
+    assert len(graph_master.get_min_data('sensor1')[1]) == 10
+
+    write_lines(path, 100, 2, 'w')
+    assert graph_master.get_min_data('sensor1')[1] == [100.0, 101.0]
+
+
+def test_replaced_file_is_reread(tmp_path):
+    graph_master, path = make_sensor(tmp_path, 3)
+    assert len(graph_master.get_min_data('sensor1')[1]) == 3
+
+    # Новый файл длиннее старого, но с другим началом - дочитывание со смещения дало бы мусор
+    replacement = tmp_path / 'sensor1' / 'min_values.tmp'
+    write_lines(replacement, 50, 5, 'w')
+    os.replace(replacement, path)
+    assert graph_master.get_min_data('sensor1')[1] == [float(i) for i in range(50, 55)]
+
+
+def test_sensor_locks_are_independent(tmp_path):
+    graph_master, _ = make_sensor(tmp_path, 3)
+    os.makedirs(tmp_path / 'sensor2')
+    write_lines(tmp_path / 'sensor2' / 'min_values.txt', 0, 2, 'w')
+    graph_master.sensor_dirs.append('sensor2')
+
+    result = []
+    # Пока история sensor2 занята (например, долгим разбором), sensor1 читается без ожидания
+    with graph_master.sensor_lock(str(tmp_path / 'sensor2')):
+        thread = threading.Thread(target=lambda: result.append(graph_master.get_min_data('sensor1')[1]))
+        thread.start()
+        thread.join(5)
+        assert result == [[0.0, 1.0, 2.0]]
+    assert graph_master.get_min_data('sensor2')[1] == [0.0, 1.0]
+
+
+def test_broken_spectrum_file_is_skipped(tmp_path):
+    graph_master, _ = make_sensor(tmp_path, 1)
+    sensor_dir = tmp_path / 'sensor1'
+    (sensor_dir / 'a.csv_output.bin').write_bytes(pack_spectrum([1.0, 2.0], [3.0, 4.0]))
+    # Заголовок обещает больше точек, чем записано
+    (sensor_dir / 'b.csv_output.bin').write_bytes(pack_spectrum([1.0, 2.0], [3.0, 4.0])[:-8])
+
+    waves = list(graph_master.get_wave_data('sensor1'))
+    assert len(waves) == 1 and list(waves[0][1]) == [3.0, 4.0]
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from async_src.manifest import MANIFEST_FILE
+from async_src.processing import FileProcessor
+
+CSV = 'header\n' * 14 + ''.join(f'{1500 + i},{abs(i - 5)}\n' for i in range(10))
+
+
+def run_ingest(tmp_path, scenario, **options):
+    """
+    Запуск get_dirs в режиме опроса, пока выполняется scenario
+    """
+    processor = FileProcessor(str(tmp_path), ['sensor1'], watch_mode='poll', poll_interval=0.1, flush_interval=0.05,
+                              **options)
+
+    async def run():
+        task = asyncio.create_task(processor.get_dirs())
+        try:
+            await scenario()
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    asyncio.run(run())
+
+
+def min_lines(tmp_path):
+    path = tmp_path / 'sensor1' / 'min_values.txt'
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def test_failed_file_is_retried(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    path = sensor_dir / 'a.csv'
+    path.write_text('header\n' * 3)  # Недописанный файл: разбор завершается ошибкой
+
+    async def scenario():
+        await asyncio.sleep(0.3)
+        assert min_lines(tmp_path) == []
+        path.write_text(CSV)
+        await asyncio.sleep(0.4)
+
+    run_ingest(tmp_path, scenario)
+    lines = min_lines(tmp_path)
+    assert len(lines) == 1 and float(lines[0].split()[1]) == 1505.0
+
+
+def test_deleted_files_are_pruned_from_manifest(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    for name in ('a.csv', 'b.csv'):
+        (sensor_dir / name).write_text(CSV)
+
+    async def scenario():
+        await asyncio.sleep(0.3)
+        os.remove(sensor_dir / 'a.csv')
+        await asyncio.sleep(0.3)
+
+    run_ingest(tmp_path, scenario)
+    assert list(json.loads((sensor_dir / MANIFEST_FILE).read_text())) == ['b.csv']
+    assert len(min_lines(tmp_path)) == 2
+
+
+def test_process_mode_keeps_min_order(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    for i in range(6):
+        path = sensor_dir / f'{i}.csv'
+        path.write_text('header\n' * 14 + ''.join(f'{1500 + j},{abs(j - i)}\n' for j in range(10)))
+        os.utime(path, (1000 + i, 1000 + i))
+
+    async def scenario():
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            if len(min_lines(tmp_path)) == 6:
+                break
+
+    run_ingest(tmp_path, scenario, ingest_mode='process', workers=2)
+    assert [float(line.split()[1]) for line in min_lines(tmp_path)] == [1500.0 + i for i in range(6)]
+
+
+@pytest.mark.parametrize('output_format', ['text', 'binary'])
+def test_process_mode_writes_same_output(tmp_path, output_format):
+    outputs = []
+    for ingest_mode in ('async', 'process'):
+        sensor_dir = tmp_path / ingest_mode / 'sensor1'
+        sensor_dir.mkdir(parents=True)
+        (sensor_dir / 'a.csv').write_text(CSV)
+        processor = FileProcessor(str(sensor_dir.parent), ['sensor1'], ingest_mode=ingest_mode, workers=1,
+                                  output_format=output_format)
+
+        async def run():
+            processor.start_executor()
+            try:
+                size = await processor.process_file(str(sensor_dir), 'a.csv')
+            finally:
+                await processor.close()
+                processor.shutdown_executor()
+            return size
+
+        size = asyncio.run(run())
+        output = sensor_dir / f'a.csv_{processor.output_file}'
+        assert output.stat().st_size == size
+        assert not (sensor_dir / f'a.csv_{processor.output_file}.tmp').exists()
+        outputs.append((output.read_bytes(), [line.split()[1:] for line in min_lines(sensor_dir.parent)]))
+    assert outputs[0] == outputs[1]
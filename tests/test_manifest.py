@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+
+from async_src.manifest import MANIFEST_FILE, ProcessedManifest
+
+
+def test_mark_save_and_load(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_text('data')
+    manifest = ProcessedManifest(str(tmp_path))
+    assert not manifest.is_processed('a.csv', os.stat(path))
+
+    asyncio.run(manifest.mark_processed('a.csv', os.stat(path)))
+    assert not (tmp_path / f'{MANIFEST_FILE}.tmp').exists()
+
+    # После перезапуска файл считается обработанным, пока не изменится
+    manifest = ProcessedManifest(str(tmp_path))
+    assert manifest.is_processed('a.csv', os.stat(path))
+    path.write_text('changed data')
+    assert not manifest.is_processed('a.csv', os.stat(path))
+
+
+def test_mark_without_save(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_text('data')
+    manifest = ProcessedManifest(str(tmp_path))
+
+    asyncio.run(manifest.mark_processed('a.csv', os.stat(path), save=False))
+    assert manifest.is_processed('a.csv', os.stat(path))
+    assert not (tmp_path / MANIFEST_FILE).exists()
+
+
+def test_broken_manifest_is_empty(tmp_path):
+    (tmp_path / MANIFEST_FILE).write_text('{"a.csv": [1')
+    assert ProcessedManifest(str(tmp_path)).entries == {}
+    (tmp_path / MANIFEST_FILE).write_text('[]')
+    assert ProcessedManifest(str(tmp_path)).entries == {}
+
+
+def test_prune(tmp_path):
+    for name in ('a.csv', 'b.csv'):
+        (tmp_path / name).write_text('data')
+    manifest = ProcessedManifest(str(tmp_path))
+
+    async def run():
+        for name in ('a.csv', 'b.csv'):
+            await manifest.mark_processed(name, os.stat(tmp_path / name))
+        await manifest.prune(['b.csv'])
+
+    asyncio.run(run())
+    assert list(manifest.entries) == ['b.csv']
+    assert list(json.loads((tmp_path / MANIFEST_FILE).read_text())) == ['b.csv']
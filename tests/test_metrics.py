@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from async_src.metrics import Metrics
+
+
+def test_arrivals_are_bounded_until_plotted():
+    metrics = Metrics()
+    now = time.time()
+    for i in range(10000):
+        metrics.record_arrival('sensor1', now - 100 + i * 0.001)
+
+    assert metrics.arrivals['sensor1'] == [now - 100, 10000]
+
+    metrics.record_plotted('sensor1')
+    assert 'sensor1' not in metrics.arrivals
+    assert list(metrics.timings[('arrival_to_plot', 'sensor1')]) == [pytest.approx(100, abs=1)]
+    assert metrics.counters[('files_plotted', 'sensor1')] == 10000
+
+
+def test_plotted_without_arrivals_records_nothing():
+    metrics = Metrics()
+    metrics.record_plotted('sensor1')
+    assert ('arrival_to_plot', 'sensor1') not in metrics.timings
+
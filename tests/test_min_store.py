@@ -0,0 +1,120 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from async_src.graph_master import GraphMaster
+from async_src.min_store import MinSegmentStore, read_segment
+from async_src.sensor_writer import SensorWriter
+
+
+def fill(sensor_dir, dates, flush_bytes=0, **options):
+    store = MinSegmentStore(str(sensor_dir), **options)
+
+    async def append():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            writer = SensorWriter(str(sensor_dir), executor, flush_bytes, min_store=store)
+            for i, date in enumerate(dates):
+                await writer.append_segment(date, float(i))
+            await writer.close()
+
+    asyncio.run(append())
+    return store
+
+
+def test_day_roll_and_overlapping(tmp_path):
+    dates = [datetime(2026, 1, day, 12) + timedelta(hours=hour) for day in (1, 2, 3) for hour in (0, 6)]
+    store = fill(tmp_path, dates)
+
+    index = store.load_index()
+    assert [segment['count'] for segment in index] == [2, 2, 2]
+    assert [segment['min'] for segment in index] == [0.0, 2.0, 4.0]
+
+    names = [segment['name'] for _, segment in store.overlapping(datetime(2026, 1, 2, 13), datetime(2026, 1, 3, 1))]
+    assert names == [index[1]['name']]
+    assert len(store.overlapping()) == 3
+
+
+def test_size_roll(tmp_path):
+    dates = [datetime(2026, 1, 1) + timedelta(seconds=i) for i in range(10)]
+    store = fill(tmp_path, dates, roll='size', max_segment_bytes=60)
+
+    index = store.load_index()
+    assert len(index) > 1
+    assert sum(segment['count'] for segment in index) == 10
+
+
+def test_range_across_segments(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    dates = [datetime(2026, 1, day, hour) for day in (1, 2, 3) for hour in (6, 18)]
+    fill(sensor_dir, dates)
+
+    graph_master = GraphMaster(str(tmp_path), ['sensor1'])
+    got, values = graph_master.get_min_data('sensor1', datetime(2026, 1, 1, 12), datetime(2026, 1, 3, 12))
+    assert got == dates[1:5]
+    assert values == [1.0, 2.0, 3.0, 4.0]
+
+    # Запрос одного дня оставляет в кэше только его сегмент
+    graph_master.get_min_data('sensor1', datetime(2026, 1, 3), datetime(2026, 1, 4))
+    assert len(graph_master.segment_cache[str(sensor_dir)]) == 1
+
+
+def test_read_segment_skips_partial_line(tmp_path):
+    path = tmp_path / 'segment.txt'
+    path.write_bytes(b'2026-01-01;00:00:00 1.5\n2026-01-01;00:00:01 2')
+
+    dates, values, _, read = read_segment(str(path))
+    assert values == [1.5]
+    assert read == len(b'2026-01-01;00:00:00 1.5\n')
+    assert read_segment(str(path), read)[1] == []
+
+
+def test_out_of_order_append(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    dates = [datetime(2026, 3, 2, 12), datetime(2026, 3, 1, 12), datetime(2026, 3, 2, 6), datetime(2026, 3, 1, 18)]
+    store = fill(sensor_dir, dates)
+
+    index = store.load_index()
+    assert [segment['count'] for segment in index] == [2, 2]
+    assert index[0]['start'] == datetime(2026, 3, 2, 6).timestamp()  # Начало сегмента сдвигается назад
+
+    graph_master = GraphMaster(str(tmp_path), ['sensor1'])
+    assert graph_master.get_min_data('sensor1', datetime(2026, 3, 1), datetime(2026, 3, 1, 23)) == \
+        ([datetime(2026, 3, 1, 12), datetime(2026, 3, 1, 18)], [1.0, 3.0])
+    got, values = graph_master.get_min_data('sensor1', datetime(2026, 3, 2, 7), datetime(2026, 3, 3))
+    assert got == [datetime(2026, 3, 2, 12)]
+    assert graph_master.get_min_data('sensor1')[0] == sorted(dates)
+
+
+def test_out_of_order_size_roll(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    # Сегменты по размеру пересекаются по времени, если строки пришли не по порядку
+    dates = [datetime(2026, 1, 1) + timedelta(minutes=minute) for minute in (5, 9, 1, 7, 3, 8, 0, 2)]
+    fill(sensor_dir, dates, roll='size', max_segment_bytes=60)
+
+    graph_master = GraphMaster(str(tmp_path), ['sensor1'])
+    got, values = graph_master.get_min_data('sensor1', datetime(2026, 1, 1, 0, 1), datetime(2026, 1, 1, 0, 8))
+    assert got == [datetime(2026, 1, 1) + timedelta(minutes=minute) for minute in (1, 2, 3, 5, 7, 8)]
+    assert values == [2.0, 7.0, 4.0, 0.0, 3.0, 5.0]
+
+
+def test_index_written_once_per_flush(tmp_path):
+    dates = [datetime(2026, 1, 1) + timedelta(seconds=i) for i in range(5)]
+    store = MinSegmentStore(str(tmp_path))
+
+    async def append():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            writer = SensorWriter(str(tmp_path), executor, flush_bytes=1024 * 1024, min_store=store)
+            for i, date in enumerate(dates):
+                await writer.append_segment(date, float(i))
+            # До записи пакета на диске нет ни сегментов, ни индекса
+            assert not MinSegmentStore.exists(str(tmp_path))
+            await writer.close()
+
+    asyncio.run(append())
+    index = store.load_index()
+    assert [segment['count'] for segment in index] == [5]
+    dates_read, values, _, _ = read_segment(store.overlapping()[0][0])
+    assert dates_read == dates and values == [0.0, 1.0, 2.0, 3.0, 4.0]
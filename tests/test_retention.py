@@ -0,0 +1,56 @@
+from async_src.retention import RetentionIndex, RetentionPolicy, delete_files
+
+NOW = 1_000_000.0
+
+
+def make_index(size=10):
+    """
+    Шесть файлов: i.csv изменен 100 * (6 - i) секунд назад
+    """
+    index = RetentionIndex()
+    # Файлы регистрируются не по порядку времени, индекс сам сортирует их
+    for i in (3, 0, 5, 1, 4, 2):
+        index.register('sensor1', f'{i}.csv', NOW - 100 * (6 - i), size)
+    return index
+
+
+def test_max_files_keeps_newest():
+    index = make_index()
+    expired = index.collect('sensor1', RetentionPolicy(max_files=4), NOW)
+    assert sorted(expired) == ['0.csv', '1.csv']
+    assert sorted(index.entries['sensor1']) == ['2.csv', '3.csv', '4.csv', '5.csv']
+    assert index.collect('sensor1', RetentionPolicy(max_files=4), NOW) == []
+
+
+def test_max_age():
+    index = make_index()
+    expired = index.collect('sensor1', RetentionPolicy(max_files=None, max_age=250), NOW)
+    assert sorted(expired) == ['0.csv', '1.csv', '2.csv', '3.csv']
+
+
+def test_max_bytes_counts_newest_first():
+    index = make_index(size=10)
+    expired = index.collect('sensor1', RetentionPolicy(max_files=None, max_bytes=35), NOW)
+    assert sorted(expired) == ['0.csv', '1.csv', '2.csv']
+
+
+def test_no_limits_and_unknown_sensor():
+    index = make_index()
+    assert index.collect('sensor1', RetentionPolicy(max_files=None), NOW) == []
+    assert index.collect('sensor2', RetentionPolicy(), NOW) == []
+
+
+def test_re_registered_file_is_counted_once():
+    index = RetentionIndex()
+    index.register('sensor1', 'a.csv', NOW - 10, 10)
+    index.register('sensor1', 'a.csv', NOW - 10, 20)
+    index.register('sensor1', 'b.csv', NOW, 10)
+    assert index.collect('sensor1', RetentionPolicy(max_files=None, max_bytes=30), NOW) == []
+
+
+def test_delete_files_removes_outputs(tmp_path):
+    for name in ('a.csv', 'a.csv_output.txt', 'a.csv_output.bin', 'b.csv', 'c.csv'):
+        (tmp_path / name).write_text('x')
+
+    assert delete_files(str(tmp_path), ['a.csv', 'b.csv', 'missing.csv']) == 4
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['c.csv']
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_src.manifest import MANIFEST_FILE, ProcessedManifest
+from async_src.sensor_writer import MIN_FILE, SensorWriter, write_file
+
+LINE = '2026-01-01;00:00:00 1500.0\n'
+
+
+def run_writer(tmp_path, scenario, **options):
+    """
+    Выполнение scenario(writer) с SensorWriter и закрытие писателя
+    """
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            writer = SensorWriter(str(tmp_path), executor, **options)
+            await scenario(writer)
+            await writer.close()
+            assert writer.min_file is None
+
+    asyncio.run(run())
+
+
+def min_text(tmp_path):
+    path = tmp_path / MIN_FILE
+    return path.read_text() if path.exists() else ''
+
+
+def test_write_file_replaces_atomically(tmp_path):
+    path = tmp_path / 'a_output.bin'
+    path.write_bytes(b'old')
+    inode = os.stat(path).st_ino
+
+    write_file(str(path), b'new', sync=True)
+    assert path.read_bytes() == b'new'
+    assert os.stat(path).st_ino != inode  # Файл заменен, а не переписан на месте
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a_output.bin']
+
+
+def test_write_file_error_keeps_old_file(tmp_path):
+    path = tmp_path / 'a_output.bin'
+    path.write_bytes(b'old')
+
+    with pytest.raises(TypeError):
+        write_file(str(path), 'not bytes')
+    assert path.read_bytes() == b'old'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a_output.bin']
+
+
+def test_flush_on_threshold_and_close(tmp_path):
+    async def scenario(writer):
+        await writer.append_min(LINE)
+        assert min_text(tmp_path) == ''  # Меньше flush_bytes - строка в памяти
+        await writer.append_min(LINE)
+        assert min_text(tmp_path) == LINE * 2
+        await writer.append_min(LINE)
+
+    run_writer(tmp_path, scenario, flush_bytes=2 * len(LINE))
+    assert min_text(tmp_path) == LINE * 3  # Остаток записан при закрытии
+
+
+def test_marks_are_saved_after_flush(tmp_path):
+    (tmp_path / 'a.csv').write_text('data')
+    manifest = ProcessedManifest(str(tmp_path))
+
+    async def scenario(writer):
+        await writer.append_min(LINE)
+        writer.defer_mark(manifest, 'a.csv', os.stat(tmp_path / 'a.csv'))
+        assert not manifest.entries and not (tmp_path / MANIFEST_FILE).exists()
+        await writer.flush()
+        assert min_text(tmp_path) == LINE
+        assert ProcessedManifest(str(tmp_path)).is_processed('a.csv', os.stat(tmp_path / 'a.csv'))
+
+    run_writer(tmp_path, scenario)
+
+
+@pytest.mark.parametrize('policy, syncs', [('never', 0), ('batch', 2), ('always', 3)])
+def test_fsync_policy(tmp_path, monkeypatch, policy, syncs):
+    calls = []
+    monkeypatch.setattr(os, 'fsync', calls.append)
+
+    async def scenario(writer):
+        await writer.append_min(LINE)
+        await writer.append_min(LINE)
+        await writer.flush()
+        await writer.write_output('a.csv_output.txt', b'1500.0 1.0\n')
+
+    run_writer(tmp_path, scenario, fsync=policy)
+    assert min_text(tmp_path) == LINE * 2
+    assert len(calls) == syncs
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        SensorWriter(str(tmp_path), None, fsync='sometimes')
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pytest
+
+from async_src.spectrum_cache import SpectrumCache
+
+POINTS = 100  # Точек в спектре: 2 массива float64 = 1600 байт
+SIZE = 2 * POINTS * 8
+
+
+def write(path, offset=0.0, points=POINTS):
+    np.savetxt(path, np.column_stack([np.arange(points) + offset, np.arange(points)]))
+
+
+def reader(path):
+    table = np.loadtxt(path)
+    return table[:, 0], table[:, 1]
+
+
+def test_hit_miss_and_bytes(tmp_path):
+    cache = SpectrumCache()
+    path = str(tmp_path / 'a')
+    write(path)
+
+    wave, values = cache.load(path, reader)
+    cache.load(path, reader)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 1, 1, SIZE)
+    assert stats['hit_rate'] == 0.5
+    with pytest.raises(ValueError):
+        wave[0] = 1.0  # Массивы из кэша только для чтения
+
+
+def test_changed_file_is_reread(tmp_path):
+    cache = SpectrumCache()
+    path = str(tmp_path / 'a')
+    write(path)
+    cache.load(path, reader)
+
+    write(path, offset=1000.0, points=2 * POINTS)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    wave, _ = cache.load(path, reader)
+
+    assert wave[0] == 1000.0
+    assert cache.stats()['misses'] == 2
+    assert cache.bytes == 2 * SIZE  # Старая запись вычтена, а не накоплена
+
+
+def test_lru_eviction_order(tmp_path):
+    cache = SpectrumCache(max_bytes=2 * SIZE)
+    paths = [str(tmp_path / name) for name in 'abc']
+    for path in paths:
+        write(path)
+
+    cache.load(paths[0], reader)
+    cache.load(paths[1], reader)
+    cache.load(paths[0], reader)  # a становится самой свежей записью
+    cache.load(paths[2], reader)
+
+    assert list(cache.entries) == [paths[0], paths[2]]
+    assert cache.bytes == 2 * SIZE
+    assert cache.stats()['evictions'] == 1
+
+
+def test_oversized_spectrum_is_not_cached(tmp_path):
+    cache = SpectrumCache(max_bytes=SIZE // 2)
+    path = str(tmp_path / 'a')
+    write(path)
+
+    wave, values = cache.load(path, reader)
+    assert len(wave) == POINTS
+    assert cache.bytes == 0 and not cache.entries
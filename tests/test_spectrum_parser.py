@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from async_src.spectrum_parser import HEADER_ROWS, parse_spectrum, stream_spectrum_file
+from async_src.spectrum_store import read_spectrum, read_text_spectrum
+
+
+def write_csv(path, wave, values):
+    with open(path, 'w') as file:
+        file.write('header\n' * HEADER_ROWS)
+        file.writelines(f'{w},{v}\n' for w, v in zip(wave, values))
+
+
+@pytest.fixture
+def spectrum(tmp_path):
+    rng = np.random.default_rng(0)
+    wave = np.linspace(1500, 1600, 1000)
+    values = rng.random(1000)
+    values[737] = -1.0  # Минимум не в первом блоке
+    path = tmp_path / 'a.csv'
+    write_csv(path, wave, values)
+    return str(path), wave, values
+
+
+def test_parse_spectrum(spectrum):
+    path, wave, values = spectrum
+    with open(path, 'rb') as file:
+        parsed_wave, parsed_values = parse_spectrum(file.read())
+    assert np.allclose(parsed_wave, wave) and np.allclose(parsed_values, values)
+
+
+def test_parse_header_only():
+    with pytest.raises(ValueError):
+        parse_spectrum(b'header\n' * HEADER_ROWS)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 100, 5000])
+@pytest.mark.parametrize('output_format', ['text', 'binary'])
+def test_stream_matches_full_parse(tmp_path, spectrum, output_format, chunk_rows):
+    path, wave, values = spectrum
+    output = str(tmp_path / f'out.{output_format}')
+
+    min_wave, source_size, output_size = stream_spectrum_file(path, output, output_format, chunk_rows)
+
+    assert min_wave == pytest.approx(wave[737])
+    assert source_size == os.path.getsize(path)
+    assert output_size == os.path.getsize(output)
+    out_wave, out_values = (read_spectrum if output_format == 'binary' else read_text_spectrum)(output)
+    assert np.allclose(out_wave, wave) and np.allclose(out_values, values)
+    assert sorted(os.listdir(tmp_path)) == sorted(['a.csv', os.path.basename(output)])
+
+
+@pytest.mark.parametrize('output_format', ['text', 'binary'])
+def test_stream_empty_file_leaves_no_output(tmp_path, output_format):
+    path = tmp_path / 'empty.csv'
+    path.write_text('header\n' * HEADER_ROWS)
+    output = tmp_path / 'out'
+    output.write_text('previous')
+
+    with pytest.raises(ValueError):
+        stream_spectrum_file(str(path), str(output), output_format, 10)
+
+    assert output.read_text() == 'previous'  # Старый файл спектра не испорчен
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['empty.csv', 'out']
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from async_src.spectrum_store import (
+    BINARY_SUFFIX, HEADER, TEXT_SUFFIX, convert_directory, main, pack_spectrum, read_spectrum, unpack_spectrum
+)
+
+WAVE = np.linspace(1500, 1600, 11)
+VALUES = np.abs(WAVE - 1550.5)
+
+
+def test_pack_unpack_round_trip():
+    data = pack_spectrum(WAVE, VALUES)
+    assert len(data) == HEADER.size + 2 * 8 * len(WAVE)
+
+    wave, values = unpack_spectrum(data)
+    assert np.array_equal(wave, WAVE) and np.array_equal(values, VALUES)
+
+
+def test_pack_errors():
+    with pytest.raises(ValueError):
+        pack_spectrum([1.0, 2.0], [1.0])
+    with pytest.raises(ValueError):
+        unpack_spectrum(b'NOPE' + pack_spectrum(WAVE, VALUES)[4:])
+
+
+def test_read_spectrum_memmap(tmp_path):
+    path = tmp_path / f'a.csv{BINARY_SUFFIX}'
+    path.write_bytes(pack_spectrum(WAVE, VALUES))
+    wave, values = read_spectrum(str(path))
+    assert np.array_equal(wave, WAVE) and np.array_equal(values, VALUES)
+
+    path.write_bytes(pack_spectrum([], []))
+    wave, values = read_spectrum(str(path))
+    assert len(wave) == len(values) == 0
+
+    path.write_bytes(b'text' * 10)
+    with pytest.raises(ValueError):
+        read_spectrum(str(path))
+
+
+def test_convert_directory(tmp_path, capsys):
+    text = ''.join(f'{w} {v}\n' for w, v in zip(WAVE.tolist(), VALUES.tolist()))
+    for sensor in ('sensor1', 'sensor2'):
+        (tmp_path / sensor).mkdir()
+        (tmp_path / sensor / f'a.csv{TEXT_SUFFIX}').write_text(text)
+
+    assert convert_directory(str(tmp_path / 'sensor1'), keep_text=True) == 1
+    assert (tmp_path / 'sensor1' / f'a.csv{TEXT_SUFFIX}').exists()
+
+    main([str(tmp_path)])
+    assert '2 files converted' in capsys.readouterr().out
+    for sensor in ('sensor1', 'sensor2'):
+        assert sorted(p.name for p in (tmp_path / sensor).iterdir()) == [f'a.csv{BINARY_SUFFIX}']
+        wave, values = read_spectrum(str(tmp_path / sensor / f'a.csv{BINARY_SUFFIX}'))
+        assert np.array_equal(wave, WAVE) and np.array_equal(values, VALUES)
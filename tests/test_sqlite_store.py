@@ -0,0 +1,85 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from async_src.manifest import ProcessedManifest
+from async_src.spectrum_store import pack_spectrum
+from async_src.sqlite_store import SQLiteReader, SQLiteWriter, delete_spectra
+
+START = datetime(2026, 1, 1)
+
+
+def fill(path, sensors=('sensor1', 'sensor2'), count=10, batch_size=3):
+    writer = SQLiteWriter(path, batch_size)
+
+    async def run():
+        for i in range(count):
+            for sensor in sensors:
+                data = pack_spectrum(np.arange(3.0) + i, np.full(3, float(i)))
+                await writer.add(sensor, START + timedelta(minutes=i), float(i), f'{i}.csv', data)
+        await writer.close()
+
+    asyncio.run(run())
+
+
+def test_reader_without_database(tmp_path):
+    reader = SQLiteReader(str(tmp_path / 'missing.sqlite'))
+    assert reader.read_minimums('sensor1') == ([], [], [])
+    assert reader.spectra_signature('sensor1') == ()
+
+
+def test_range_queries(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    fill(path)
+    reader = SQLiteReader(path)
+
+    dates, values, times = reader.read_minimums('sensor1')
+    assert values == [float(i) for i in range(10)]
+    assert dates[0] == START and times == sorted(times)
+
+    # Границы диапазона включаются
+    dates, values, _ = reader.read_minimums('sensor2', START + timedelta(minutes=3), START + timedelta(minutes=5))
+    assert values == [3.0, 4.0, 5.0]
+    assert reader.read_minimums('sensor1', START + timedelta(hours=1))[1] == []
+    assert reader.read_minimums('sensor3')[1] == []
+
+
+def test_spectra_round_trip_and_delete(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    fill(path, sensors=('sensor1',), count=4)
+    reader = SQLiteReader(path)
+
+    spectra = list(reader.read_spectra('sensor1'))
+    assert [values[0] for _, values in spectra] == [0.0, 1.0, 2.0, 3.0]
+    assert np.array_equal(spectra[2][0], [2.0, 3.0, 4.0])
+    signature = reader.spectra_signature('sensor1')
+    assert [filename for filename, _ in signature] == ['0.csv', '1.csv', '2.csv', '3.csv']
+
+    assert delete_spectra(path, 'sensor1', ['0.csv', '2.csv', 'missing.csv']) == 2
+    assert [filename for filename, _ in reader.spectra_signature('sensor1')] == ['1.csv', '3.csv']
+    assert len(reader.read_minimums('sensor1')[1]) == 4  # Минимумы сборщик мусора не удаляет
+
+
+def test_marks_are_saved_after_commit(tmp_path):
+    sensor_dir = tmp_path / 'sensor1'
+    sensor_dir.mkdir()
+    (sensor_dir / 'a.csv').write_text('x')
+    stat = os.stat(sensor_dir / 'a.csv')
+    path = str(tmp_path / 'db.sqlite')
+    writer = SQLiteWriter(path, batch_size=100)
+    manifest = ProcessedManifest(str(sensor_dir))
+
+    async def run():
+        await writer.add('sensor1', START, 1.0, 'a.csv', pack_spectrum([1.0], [1.0]))
+        writer.defer_mark(manifest, 'a.csv', stat)
+        assert not manifest.is_processed('a.csv', stat)
+        assert SQLiteReader(path).read_minimums('sensor1')[1] == []
+        await writer.flush()
+        assert manifest.is_processed('a.csv', stat)
+        assert SQLiteReader(path).read_minimums('sensor1')[1] == [1.0]
+        await writer.close()
+
+    asyncio.run(run())
+    assert ProcessedManifest(str(sensor_dir)).is_processed('a.csv', stat)